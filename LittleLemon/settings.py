@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'LittleLemonDRF.performance.PerformanceMiddleware',
+    'LittleLemonDRF.db_routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +81,97 @@ WSGI_APPLICATION = 'LittleLemon.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, busy_timeout makes a blocked writer wait (in milliseconds)
+# instead of failing with "database is locked", and a negative cache_size is
+# in KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Transactions take the write lock up front, so a transaction that
+            # reads and then writes waits on busy_timeout instead of failing
+            # at once when another writer got there first.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Seconds to reuse a connection across requests, checking it first.
+        # Under ASGI each request runs in its own thread and would leave its
+        # connection open, so this stays 0 unless the environment (or the
+        # WSGI entry point, see wsgi.py) sets CONN_MAX_AGE.
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        # A file rather than the shared in-memory database, so that tests
+        # running checkouts in parallel threads see the locking (WAL,
+        # busy_timeout, IMMEDIATE) the server does.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Read replicas, as a comma-separated list of SQLite files in DATABASE_REPLICAS.
+# Safe requests read from them (see LittleLemonDRF.db_routers); a client that
+# just wrote gets a cookie that keeps its reads on the primary for
+# REPLICA_STICKY_SECONDS. Locally, `manage.py sync_replicas` copies the
+# primary over the replica files.
+REPLICA_DATABASES = []
+for index, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'NAME': path.strip(), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['LittleLemonDRF.db_routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Use a shared backend (Redis, Memcached, database) when running several
+# worker processes so that invalidations reach every process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Seconds a user's group memberships are cached for permission checks. Group
+# changes drop the cached entry, but only in the process that made them
+# unless CACHES above is shared, so the default is 300 with a shared cache
+# and 5 with a process-local (LocMem) one.
+# ROLE_CACHE_TIMEOUT = 300
+
+# Seconds a rendered menu list/detail stays in the response cache. Entries are
+# also invalidated whenever a MenuItem or Category changes.
+MENU_CACHE_TIMEOUT = 600
+
+# Upper price bounds of the buckets counted by /api/menu-items/facets; one
+# more, open-ended bucket holds everything above the last.
+MENU_PRICE_BUCKETS = [5, 10, 20, 50]
+
+# Per-request timing (Server-Timing header and /api/performance/stats). Set to
+# False to remove the middleware and the database query timer altogether.
+PERFORMANCE_METRICS_ENABLED = True
+
+# Authenticated tokens are remembered per process for up to this many seconds,
+# bounded to TOKEN_CACHE_SIZE entries. Deleting a token or deactivating a user
+# drops the entries at once. Other processes learn of it through
+# TOKEN_CACHE_SHARED, a cache alias they all share: 'default' unless CACHES
+# above is process-local (LocMem). With a LocMem cache and several workers, a
+# revoked token keeps working in the other workers for up to
+# TOKEN_CACHE_TIMEOUT seconds.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TIMEOUT = 60
+# TOKEN_CACHE_SHARED = 'default'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -128,14 +216,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'LittleLemonDRF.authentication.CachedTokenAuthentication',
     ],
+    # orjson is used when installed; MessagePack is offered when msgpack is.
+    'DEFAULT_RENDERER_CLASSES': [
+        'LittleLemonDRF.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['LittleLemonDRF.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'LittleLemonDRF.throttling.AnonTokenBucketThrottle',
+        'LittleLemonDRF.throttling.UserTokenBucketThrottle',
+        'LittleLemonDRF.throttling.ScopedTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '10/day',
         'user': '60/day',
+        # Per-endpoint budgets, picked by the view's throttle_scope and method.
+        'menu.read': '120/minute',
+        'menu.write': '30/minute',
+        'cart': '60/minute',
+        'orders.read': '60/minute',
+        'orders.write': '20/minute',
     }
-}
\ No newline at end of file
+}
+
+# Where the token buckets of the throttles live. The SQLite file is shared by
+# all worker processes on one host; with several hosts, point this at
+# 'LittleLemonDRF.throttling.CacheBucketStore' and a shared cache instead.
+THROTTLE_STORE = {
+    'BACKEND': 'LittleLemonDRF.throttling.SQLiteBucketStore',
+    'OPTIONS': {'path': BASE_DIR / 'throttle.sqlite3'},
+}
+# How order change events reach the SSE and long-poll subscribers. The local
+# backend only reaches subscribers in the publishing process; with several
+# worker processes on one host, use 'LittleLemonDRF.events.SQLiteEventBackend'
+# with {'path': BASE_DIR / 'events.sqlite3'} as OPTIONS instead.
+EVENTS_BACKEND = {
+    'BACKEND': 'LittleLemonDRF.events.LocalEventBackend',
+}
+
+# 'sync' creates the order inside the checkout request. 'queued' only saves
+# the cart as a CheckoutTicket and answers 202; `manage.py process_order_queue`
+# turns tickets into orders, ORDER_QUEUE_BATCH_SIZE per transaction. The
+# order.created events then come from the queue workers, so SSE clients need
+# the SQLite events backend to see them.
+ORDER_INGESTION_MODE = 'sync'
+ORDER_QUEUE_BATCH_SIZE = 100
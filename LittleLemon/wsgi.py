@@ -12,5 +12,8 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
+# WSGI workers serve requests from a fixed set of threads, so their
+# connections can be kept open between requests.
+os.environ.setdefault('CONN_MAX_AGE', '600')
 
 application = get_wsgi_application()
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, IntegerField, Value, When
+
+from .models import DailySales, MenuItemDailySales
+
+_MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def record_order(order, lines):
+    """Add an order to the sales summaries.
+
+    ``lines`` are ``(menuitem_id, quantity, price)`` tuples. Call inside the
+    transaction that creates the order so the summaries never drift from it.
+    """
+    _apply(order.date, order.total, lines, 1)
+
+
+def record_orders(orders):
+    """Add many orders to the sales summaries with a few statements per day.
+
+    ``orders`` are ``(order, lines)`` pairs as passed to record_order.
+    """
+    days = defaultdict(lambda: [0, Decimal(0), []])
+    for order, lines in orders:
+        day = days[order.date]
+        day[0] += 1
+        day[1] += Decimal(order.total)
+        day[2].extend(lines)
+    for day, (count, total, lines) in days.items():
+        _apply(day, total, lines, 1, count)
+
+
+def remove_order(order):
+    lines = order.orderitem_set.values_list('menuitem_id', 'quantity', 'price')
+    _apply(order.date, order.total, lines, -1)
+
+
+def _apply(day, total, lines, sign, orders=1):
+    # Ensure the summary rows exist, then adjust them with relative UPDATEs so
+    # concurrent orders for the same day never overwrite each other.
+    DailySales.objects.bulk_create([DailySales(date=day)], ignore_conflicts=True)
+    DailySales.objects.filter(date=day).update(
+        order_count=F('order_count') + sign * orders,
+        revenue=F('revenue') + Value(sign * Decimal(total), output_field=_MONEY),
+    )
+
+    per_item = defaultdict(lambda: [0, Decimal(0)])
+    for menuitem_id, quantity, price in lines:
+        per_item[menuitem_id][0] += quantity
+        per_item[menuitem_id][1] += Decimal(price)
+    if not per_item:
+        return
+
+    MenuItemDailySales.objects.bulk_create(
+        [MenuItemDailySales(date=day, menuitem_id=menuitem_id) for menuitem_id in per_item],
+        ignore_conflicts=True,
+    )
+    MenuItemDailySales.objects.filter(date=day, menuitem_id__in=per_item).update(
+        quantity=F('quantity') + Case(
+            *[When(menuitem_id=menuitem_id, then=Value(sign * quantity)) for menuitem_id, (quantity, _) in per_item.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        revenue=F('revenue') + Case(
+            *[When(menuitem_id=menuitem_id, then=Value(sign * revenue)) for menuitem_id, (_, revenue) in per_item.items()],
+            default=Value(Decimal(0)),
+            output_field=_MONEY,
+        ),
+    )
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LittlelemondrfConfig(AppConfig):
     name = 'LittleLemonDRF'
+
+    def ready(self):
+        from . import performance, signals  # noqa: F401
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from copy import copy
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from .caching import is_shared_cache
+
+TOKEN_CACHE_SIZE = getattr(settings, 'TOKEN_CACHE_SIZE', 10000)
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60)
+# Revisions go through the default cache whenever the workers share it.
+TOKEN_CACHE_SHARED = getattr(settings, 'TOKEN_CACHE_SHARED', 'default' if is_shared_cache() else None)
+
+CachedToken = namedtuple('CachedToken', ['token', 'expires', 'revision'])
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that can also authenticate without leaving the event loop."""
+
+    def get_token_key(self, request):
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _('Invalid token header. No credentials provided.')
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _('Invalid token header. Token string should not contain spaces.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _('Invalid token header. Token string should not contain invalid characters.')
+            raise exceptions.AuthenticationFailed(msg)
+
+    def authenticate(self, request):
+        key = self.get_token_key(request)
+        if key is None:
+            return None
+        return self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request):
+        key = self.get_token_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+class TokenCache:
+    """Process-local LRU of token key -> authenticated token, bounded in size and age."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, token, revision):
+        with self._lock:
+            self._entries[key] = CachedToken(token, time.monotonic() + self.timeout, revision)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.token.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TIMEOUT)
+
+
+def _revision_key(user_id):
+    return f'auth-token-revision:{user_id}'
+
+
+def _revoke(user_id):
+    # Other processes cannot see this one's LRU, so with a shared cache a new
+    # revision marker makes their entries for the user stale as well. The
+    # marker outlives every entry created before it.
+    if TOKEN_CACHE_SHARED:
+        caches[TOKEN_CACHE_SHARED].set(_revision_key(user_id), uuid4().hex, TOKEN_CACHE_TIMEOUT)
+
+
+def invalidate_token(key, user_id):
+    token_cache.discard(key)
+    _revoke(user_id)
+
+
+def invalidate_user_tokens(user_id):
+    token_cache.discard_user(user_id)
+    _revoke(user_id)
+
+
+class CachedTokenAuthentication(AsyncTokenAuthentication):
+    """AsyncTokenAuthentication that remembers recently seen tokens.
+
+    A cache hit costs no query. Entries live at most TOKEN_CACHE_TIMEOUT
+    seconds and are dropped as soon as the token is deleted (djoser logout)
+    or the user is deactivated or deleted. Those drops reach the other
+    processes through TOKEN_CACHE_SHARED, a cache alias all workers share,
+    which is the default cache unless that is process-local; without one,
+    the other processes honour a revoked token until their entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        shared = caches[TOKEN_CACHE_SHARED] if TOKEN_CACHE_SHARED else None
+        entry = token_cache.get(key)
+        if entry is not None and (shared is None or shared.get(_revision_key(entry.token.user_id)) == entry.revision):
+            return copy(entry.token.user), entry.token
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, token, shared.get(_revision_key(user.pk)) if shared else None)
+        return user, token
+
+    async def aauthenticate_credentials(self, key):
+        shared = caches[TOKEN_CACHE_SHARED] if TOKEN_CACHE_SHARED else None
+        entry = token_cache.get(key)
+        if entry is not None and (
+            shared is None or await shared.aget(_revision_key(entry.token.user_id)) == entry.revision
+        ):
+            return copy(entry.token.user), entry.token
+
+        user, token = await super().aauthenticate_credentials(key)
+        token_cache.set(key, token, await shared.aget(_revision_key(user.pk)) if shared else None)
+        return user, token
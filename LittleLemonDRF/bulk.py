@@ -0,0 +1,289 @@
+import codecs
+import csv
+import json
+from itertools import groupby, islice
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.response import Response
+
+from .caching import bump_catalog_version
+from .models import Category, MenuItem
+from .serializers import CategoryImportSerializer, MenuItemImportSerializer
+
+NDJSON_MEDIA_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines')
+CSV_MEDIA_TYPE = 'text/csv'
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': CSV_MEDIA_TYPE,
+}
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_EXPORT_FIELDS = ('id', 'user', 'delivery_crew', 'status', 'total', 'date')
+ORDER_ITEM_EXPORT_FIELDS = ('menuitem', 'quantity', 'unit_price', 'price')
+
+
+def iter_request_rows(request):
+    """Yield ``(line_number, row)`` from an NDJSON or CSV body as it is read.
+
+    The body is consumed line by line from the underlying HttpRequest, so
+    memory use does not grow with the size of the upload.
+    """
+    content_type = request._request.content_type
+    lines = codecs.iterdecode(request._request, 'utf-8')
+
+    if content_type == CSV_MEDIA_TYPE:
+        reader = csv.DictReader(lines)
+        try:
+            for row in reader:
+                # Empty cells mean "not provided", e.g. no id for a new row.
+                yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error on line {reader.line_num}: {exc}')
+    elif content_type in NDJSON_MEDIA_TYPES:
+        try:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    raise ParseError(f'JSON parse error on line {line_number}: {exc}')
+                yield line_number, row
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'Body is not valid UTF-8: {exc}')
+    else:
+        raise UnsupportedMediaType(content_type)
+
+
+class CatalogImporter:
+    """Validate and upsert catalog rows in batches, inside one transaction.
+
+    Each batch is validated field by field with a database-free serializer,
+    references are checked with one query per batch, and rows are written
+    with ``bulk_create`` (new ids) and ``bulk_update`` (existing ids). Any
+    error rolls the whole import back.
+    """
+    model = None
+    serializer_class = None
+    update_fields = ()
+    batch_size = 1000
+    max_errors = 100
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.seen_ids = set()
+
+    def run(self, rows):
+        with transaction.atomic():
+            batch = []
+            for line, data in rows:
+                batch.append((line, data))
+                if len(batch) >= self.batch_size:
+                    self.process(batch)
+                    batch = []
+                if len(self.errors) >= self.max_errors:
+                    break
+            if batch:
+                self.process(batch)
+
+            if self.errors:
+                transaction.set_rollback(True)
+            else:
+                transaction.on_commit(bump_catalog_version)
+
+    def process(self, batch):
+        valid = []
+        for line, data in batch:
+            serializer = self.serializer_class(data=data)
+            if not serializer.is_valid():
+                self.errors.append({'line': line, 'errors': serializer.errors})
+                continue
+            row_id = serializer.validated_data.get('id')
+            if row_id is not None:
+                if row_id in self.seen_ids:
+                    self.errors.append({'line': line, 'errors': {'id': ['Duplicate id in this import.']}})
+                    continue
+                self.seen_ids.add(row_id)
+            valid.append((line, serializer.validated_data))
+
+        valid = self.check_references(valid)
+        if self.errors:
+            # Keep validating the rest for the error report, but stop writing.
+            return
+
+        ids = [data['id'] for _, data in valid if 'id' in data]
+        existing = set(self.model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        to_create = [self.build(data) for _, data in valid if data.get('id') not in existing]
+        to_update = [self.build(data) for _, data in valid if data.get('id') in existing]
+        self.model.objects.bulk_create(to_create)
+        self.model.objects.bulk_update(to_update, self.update_fields)
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+    def check_references(self, valid):
+        return valid
+
+    def build(self, data):
+        return self.model(**data)
+
+
+class CategoryImporter(CatalogImporter):
+    model = Category
+    serializer_class = CategoryImportSerializer
+    update_fields = ('slug', 'title')
+
+
+class MenuItemImporter(CatalogImporter):
+    model = MenuItem
+    serializer_class = MenuItemImportSerializer
+    update_fields = ('title', 'price', 'featured', 'category')
+
+    def check_references(self, valid):
+        category_ids = {data['category'] for _, data in valid}
+        known = set(Category.objects.filter(pk__in=category_ids).values_list('pk', flat=True))
+        checked = []
+        for line, data in valid:
+            if data['category'] in known:
+                checked.append((line, data))
+            else:
+                message = f'Invalid pk "{data["category"]}" - object does not exist.'
+                self.errors.append({'line': line, 'errors': {'category': [message]}})
+        return checked
+
+    def build(self, data):
+        data = dict(data)
+        data['category_id'] = data.pop('category')
+        return self.model(**data)
+
+
+def import_response(importer, request):
+    importer.run(iter_request_rows(request))
+    if importer.errors:
+        return Response({'errors': importer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'created': importer.created, 'updated': importer.updated}, status=status.HTTP_200_OK)
+
+
+def iter_export(rows, fields, export_format, header=True):
+    """Render ``values_list`` rows as NDJSON or CSV, one chunk per row."""
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        if header:
+            yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), default=str) + '\n'
+
+
+async def aiter_export(rows, render, group_width=None):
+    """Async counterpart of ``render(rows.iterator())`` for ASGI servers.
+
+    Django's ASGI handler buffers a synchronous streaming body in full
+    before sending it, so ``rows`` (a ``values_list`` queryset) is fetched a
+    batch at a time in a worker thread and rendered in between. Not with
+    ``aiterator()``: for ``values_list`` it opens the cursor on the event
+    loop. With ``group_width``, batches only end where the first
+    ``group_width`` columns change, so a grouping renderer never sees half
+    a group.
+    """
+    rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    header = True
+    pending = []
+    while True:
+        fetched = await sync_to_async(list)(islice(rows, EXPORT_CHUNK_SIZE))
+        finished = len(fetched) < EXPORT_CHUNK_SIZE
+        batch = pending + fetched
+        pending = []
+        if group_width is not None and not finished:
+            # The last group may go on in the next batch.
+            while batch and batch[-1][:group_width] == fetched[-1][:group_width]:
+                pending.append(batch.pop())
+            pending.reverse()
+        if batch or (finished and header):
+            for chunk in render(batch, header):
+                yield chunk
+            header = False
+        if finished:
+            return
+
+
+def export_response(queryset, fields, request, filename):
+    rows = queryset.order_by('pk').values_list(*fields)
+
+    def render(export_format):
+        if is_asgi(request):
+            return aiter_export(rows, lambda batch, header: iter_export(batch, fields, export_format, header))
+        return iter_export(rows.iterator(chunk_size=EXPORT_CHUNK_SIZE), fields, export_format)
+
+    return streaming_export(request, filename, render)
+
+
+def iter_order_export(rows, export_format, header=True):
+    """Render joined order/order item rows as NDJSON or CSV.
+
+    CSV gets one line per order item with the order columns repeated.
+    NDJSON gets one object per order with its items nested, grouped from
+    consecutive rows so only one order is held in memory at a time.
+    """
+    if export_format == 'csv':
+        yield from iter_export(rows, ORDER_EXPORT_FIELDS + ORDER_ITEM_EXPORT_FIELDS, export_format, header)
+        return
+
+    width = len(ORDER_EXPORT_FIELDS)
+    for order, lines in groupby(rows, key=lambda row: row[:width]):
+        data = dict(zip(ORDER_EXPORT_FIELDS, order))
+        # Orders without items come back from the outer join as one row of NULLs.
+        data['order_items'] = [
+            dict(zip(ORDER_ITEM_EXPORT_FIELDS, line[width:])) for line in lines if line[width] is not None
+        ]
+        yield json.dumps(data, default=str) + '\n'
+
+
+def order_export_response(orders, request):
+    rows = (
+        orders.order_by('pk', 'orderitem__pk')
+        .values_list(*ORDER_EXPORT_FIELDS, *(f'orderitem__{field}' for field in ORDER_ITEM_EXPORT_FIELDS))
+    )
+
+    def render(export_format):
+        if is_asgi(request):
+            return aiter_export(
+                rows, lambda batch, header: iter_order_export(batch, export_format, header),
+                group_width=len(ORDER_EXPORT_FIELDS) if export_format == 'ndjson' else None,
+            )
+        return iter_order_export(rows.iterator(chunk_size=EXPORT_CHUNK_SIZE), export_format)
+
+    return streaming_export(request, 'orders', render)
+
+
+def is_asgi(request):
+    """Whether ``request`` is served by an ASGI server, which needs an async streaming body."""
+    return 'wsgi.version' not in request.META
+
+
+def streaming_export(request, filename, render):
+    export_format = request.query_params.get('type', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'type': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    response = StreamingHttpResponse(render(export_format), content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
@@ -0,0 +1,91 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+MENU_CACHE_TIMEOUT = getattr(settings, 'MENU_CACHE_TIMEOUT', 600)
+
+_VERSION_KEY = 'menu-catalog:version'
+
+
+def is_shared_cache(alias='default'):
+    """Whether every worker process sees the same cache ``alias``; LocMem (and dummy) caches are per process."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def get_catalog_version():
+    """Return the catalog version, a unix timestamp that doubles as Last-Modified."""
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        version = int(time.time())
+        if not cache.add(_VERSION_KEY, version, None):
+            version = cache.get(_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    # Always move forward by at least a second so If-Modified-Since, which
+    # only has second resolution, can never match a stale representation.
+    version = max(int(time.time()), get_catalog_version() + 1)
+    cache.set(_VERSION_KEY, version, None)
+    return version
+
+
+def normalized_query(request):
+    return urlencode(sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    ))
+
+
+class CatalogCacheMixin:
+    """Serve list/retrieve from a response cache keyed on the catalog version.
+
+    Cache entries hold response data rather than rendered bytes, so every
+    renderer shares them; the ETag also covers the negotiated media type.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_catalog_cache_key(self, request, version):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        return (
+            f'menu-catalog:{version}:{self.basename}:{self.action}:{lookup}:'
+            f'{request.scheme}://{request.get_host()}?{normalized_query(request)}'
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = get_catalog_version()
+        key = self.get_catalog_cache_key(request, version)
+        etag = quote_etag(hashlib.blake2b(
+            f'{key}|{request.accepted_media_type}'.encode(), digest_size=16,
+        ).hexdigest())
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=version)
+        if response is None:
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, MENU_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(version)
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
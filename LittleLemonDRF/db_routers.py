@@ -0,0 +1,102 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+REPLICA_STICKY_COOKIE = getattr(settings, 'REPLICA_STICKY_COOKIE', 'replica_sticky')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_databases():
+    """The aliases of the read replicas (REPLICA_DATABASES), read on every call so tests can override them."""
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+class PrimaryReplicaRouter:
+    """Send reads to a replica while ReplicaRoutingMiddleware allows it.
+
+    Writes, reads inside a transaction on the primary and everything outside
+    a replica-eligible request go to ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_databases()
+        if not replicas or not _replica_reads.get() or connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_databases()
+
+
+def _is_sticky(request):
+    # The cookie holds the time its stickiness ends, in case the client
+    # keeps it past its max-age.
+    try:
+        return float(request.COOKIES.get(REPLICA_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _make_sticky(request, response):
+    response.set_cookie(
+        REPLICA_STICKY_COOKIE, str(int(time.time()) + REPLICA_STICKY_SECONDS), max_age=REPLICA_STICKY_SECONDS,
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+    return response
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from the replicas, with read-your-writes stickiness.
+
+    A response to a write carries a short-lived cookie, and the client's
+    reads stay on the primary while it does (REPLICA_STICKY_SECONDS), so e.g.
+    a customer sees the order they just placed despite replication lag. The
+    cookie travels with the client, whichever worker serves the next request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_databases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method not in SAFE_METHODS:
+            return _make_sticky(request, self.get_response(request))
+
+        token = _replica_reads.set(not _is_sticky(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+
+    async def __acall__(self, request):
+        if request.method not in SAFE_METHODS:
+            return _make_sticky(request, await self.get_response(request))
+
+        token = _replica_reads.set(not _is_sticky(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
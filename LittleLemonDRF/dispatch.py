@@ -0,0 +1,134 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, FilteredRelation, Q, Value, When
+
+from .events import order_event, publish
+from .models import Order
+from .roles import DELIVERY_CREW
+
+User = get_user_model()
+
+DISPATCH_BATCH_SIZE = getattr(settings, 'DISPATCH_BATCH_SIZE', 500)
+
+
+def crew_members(user_ids):
+    """Return which of ``user_ids`` are active Delivery Crew members, in one query."""
+    return set(
+        User.objects.filter(pk__in=user_ids, is_active=True, groups__name=DELIVERY_CREW)
+        .values_list('pk', flat=True)
+    )
+
+
+def crew_loads():
+    """Return ``{crew id: open orders}`` for every active Delivery Crew member."""
+    # Joining only the open orders lets the (crew, status, date) index find
+    # them instead of counting every order a member ever delivered.
+    return dict(
+        User.objects.filter(is_active=True, groups__name=DELIVERY_CREW)
+        .annotate(open_orders=FilteredRelation('delivery_crew', condition=Q(delivery_crew__status__in=[False])))
+        .annotate(open_order_count=Count('open_orders'))
+        .values_list('pk', 'open_order_count')
+    )
+
+
+def _update_crew(assignments, unassigned_only):
+    """Apply ``{order id: crew id}`` with one ``UPDATE ... CASE`` per batch; returns the rows changed."""
+    updated = 0
+    items = list(assignments.items())
+    for start in range(0, len(items), DISPATCH_BATCH_SIZE):
+        # One WHEN per crew member rather than per order keeps the statement,
+        # and the time Django takes to build it, small.
+        by_crew = defaultdict(list)
+        for order_id, crew_id in items[start:start + DISPATCH_BATCH_SIZE]:
+            by_crew[crew_id].append(order_id)
+        orders = Order.objects.filter(pk__in=[order_id for order_ids in by_crew.values() for order_id in order_ids])
+        if unassigned_only:
+            orders = orders.filter(delivery_crew__isnull=True)
+        updated += orders.update(delivery_crew=Case(
+            *(When(pk__in=order_ids, then=Value(crew_id)) for crew_id, order_ids in by_crew.items()),
+        ))
+    return updated
+
+
+def dispatch_orders(limit=None):
+    """Assign unassigned, undelivered orders to the least-loaded crew members.
+
+    Orders are handed out oldest first, each to the member with the fewest
+    open orders at that point (ties go to the lowest id), and written with
+    batched UPDATEs. Returns ``{order id: crew id}`` for the orders assigned.
+
+    Two dispatches never assign the same order: on SQLite the IMMEDIATE
+    transaction serializes them, elsewhere the pending orders are locked and
+    skipped by the other dispatcher, and the UPDATE only touches orders that
+    are still unassigned in any case.
+    """
+    with transaction.atomic():
+        loads = crew_loads()
+        if not loads:
+            return {}
+
+        pending = (
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(delivery_crew__isnull=True, status__in=[False])
+            .order_by('date', 'pk')
+            .values_list('pk', 'user_id')
+        )
+        if limit is not None:
+            pending = pending[:limit]
+
+        heap = [(load, crew_id) for crew_id, load in loads.items()]
+        heapq.heapify(heap)
+        assignments, customers = {}, {}
+        for order_id, user_id in pending:
+            customers[order_id] = user_id
+            load, crew_id = heap[0]
+            assignments[order_id] = crew_id
+            heapq.heapreplace(heap, (load + 1, crew_id))
+
+        if _update_crew(assignments, unassigned_only=True) != len(assignments):
+            # Without row locks a concurrent manager may have assigned some
+            # of them by hand; report what actually happened.
+            assignments = {
+                order_id: crew_id
+                for order_id, crew_id in Order.objects.filter(pk__in=assignments).values_list('pk', 'delivery_crew_id')
+                if assignments[order_id] == crew_id
+            }
+        publish(*(
+            order_event('order.updated', order_id, customers[order_id], crew_id, False)
+            for order_id, crew_id in assignments.items()
+        ))
+    return assignments
+
+
+def assign_orders(assignments):
+    """Apply manager-chosen ``{order id: crew id}`` assignments, all or none.
+
+    Crew membership is checked for all of them in one query and the orders
+    are written with batched UPDATEs. Returns ``{order id: message}`` for the
+    assignments that are invalid, in which case nothing is changed.
+    """
+    with transaction.atomic():
+        members = crew_members(set(assignments.values()))
+        existing = {
+            order_id: (user_id, crew_id, status)
+            for order_id, user_id, crew_id, status in Order.objects.filter(pk__in=assignments)
+            .values_list('pk', 'user_id', 'delivery_crew_id', 'status')
+        }
+        errors = {}
+        for order_id, crew_id in assignments.items():
+            if order_id not in existing:
+                errors[order_id] = 'Order not found.'
+            elif crew_id not in members:
+                errors[order_id] = 'Assigned user is not in Delivery Crew.'
+        if not errors:
+            _update_crew(assignments, unassigned_only=False)
+            events = []
+            for order_id, crew_id in assignments.items():
+                user_id, previous_crew_id, order_status = existing[order_id]
+                events.append(order_event('order.updated', order_id, user_id, crew_id, order_status, previous_crew_id))
+            publish(*events)
+    return errors
@@ -0,0 +1,310 @@
+import asyncio
+import itertools
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .roles import DELIVERY_CREW, MANAGER
+
+EVENTS_BUFFER_SIZE = getattr(settings, 'EVENTS_BUFFER_SIZE', 1000)
+EVENTS_QUEUE_SIZE = getattr(settings, 'EVENTS_QUEUE_SIZE', 100)
+EVENTS_HEARTBEAT = getattr(settings, 'EVENTS_HEARTBEAT', 15)
+
+
+def order_event(event_type, order_id, user_id, delivery_crew_id, status, previous_delivery_crew_id=None):
+    """Build the payload of an ``order.created`` / ``order.updated`` / ``order.deleted`` event."""
+    event = {
+        'type': event_type,
+        'order': order_id,
+        'user': user_id,
+        'delivery_crew': delivery_crew_id,
+        'status': status,
+    }
+    if previous_delivery_crew_id is not None and previous_delivery_crew_id != delivery_crew_id:
+        # Lets the crew member an order was taken from hear about it too.
+        event['previous_delivery_crew'] = previous_delivery_crew_id
+    return event
+
+
+def publish(*events):
+    """Publish ``events`` once the current transaction commits (right away outside one)."""
+    if events:
+        transaction.on_commit(lambda: get_event_backend().publish(events))
+
+
+class Subscriber:
+    """One listening client: its pending events and the loop waiting for them.
+
+    Events are appended from any thread and the waiting coroutine is woken on
+    its own loop. A subscriber that falls more than EVENTS_QUEUE_SIZE events
+    behind is marked ``lost``; its stream ends and the client resumes from
+    the broker's buffer with ``Last-Event-ID``.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.pending = deque()
+        self.lost = False
+
+    def put(self, event):
+        if len(self.pending) >= EVENTS_QUEUE_SIZE:
+            self.lost = True
+        else:
+            self.pending.append(event)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def get(self, timeout):
+        """Return the pending events, waiting up to ``timeout`` seconds for one."""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.ready.clear()
+        events = []
+        while self.pending:
+            events.append(self.pending.popleft())
+        return events
+
+
+def subscription_keys(user, roles):
+    """The routing keys of the events a user may see: all, their orders, or the ones assigned to them."""
+    if MANAGER in roles:
+        return frozenset(['all'])
+    if DELIVERY_CREW in roles:
+        return frozenset([('delivery_crew', user.pk)])
+    return frozenset([('user', user.pk)])
+
+
+def event_keys(event):
+    keys = ['all', ('user', event['user']), ('delivery_crew', event['delivery_crew'])]
+    if 'previous_delivery_crew' in event:
+        keys.append(('delivery_crew', event['previous_delivery_crew']))
+    return keys
+
+
+class EventBroker:
+    """Fan events out to the subscribers of this process.
+
+    Subscribers are indexed by routing key, so delivering an event touches
+    only those allowed to see it and idle subscribers cost nothing but their
+    entry. The last EVENTS_BUFFER_SIZE events are kept for clients resuming
+    after a reconnect.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.buffer = deque(maxlen=EVENTS_BUFFER_SIZE)
+
+    def subscribe(self, keys):
+        subscriber = Subscriber(keys)
+        with self.lock:
+            for key in keys:
+                self.subscribers[key].add(subscriber)
+        get_event_backend().subscribed()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            for key in subscriber.keys:
+                self.subscribers[key].discard(subscriber)
+                if not self.subscribers[key]:
+                    del self.subscribers[key]
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def deliver(self, event):
+        with self.lock:
+            self.buffer.append(event)
+            targets = set().union(*(self.subscribers.get(key, ()) for key in event_keys(event)))
+        for subscriber in targets:
+            try:
+                subscriber.put(event)
+            except RuntimeError:
+                # Its event loop is gone without unsubscribing.
+                self.unsubscribe(subscriber)
+
+    def last_id(self):
+        with self.lock:
+            return self.buffer[-1]['id'] if self.buffer else 0
+
+    def since(self, last_id, keys):
+        """Buffered events after ``last_id`` visible under ``keys``."""
+        with self.lock:
+            return [
+                event for event in self.buffer
+                if event['id'] > last_id and not keys.isdisjoint(event_keys(event))
+            ]
+
+
+broker = EventBroker()
+
+
+class LocalEventBackend:
+    """Deliver events to the subscribers of this process only.
+
+    Enough for a single worker process; with several, use SQLiteEventBackend
+    (or another backend) so an event published in one reaches all of them.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        with self._lock:
+            for event in events:
+                broker.deliver({'id': next(self._ids), **event})
+
+    def subscribed(self):
+        pass
+
+
+class SQLiteEventBackend:
+    """Fan events out across the worker processes of a host through a SQLite file.
+
+    Publishing appends to the file; each process runs one thread that polls
+    it for new rows and hands them to its broker, while it has subscribers.
+    The poll is one indexed query per interval per process however many
+    clients are listening, and never touches the application database.
+    """
+
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, path, poll_interval=0.25, retention=300, timeout=5):
+        self.path = str(path)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.timeout = timeout
+        self._local = threading.local()
+        self._poller = None
+        self._poller_lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS order_event ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, payload TEXT NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def publish(self, events):
+        connection = self.connection()
+        now = time.time()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT INTO order_event (created, payload) VALUES (?, ?)',
+                [(now, json.dumps(event)) for event in events],
+            )
+        if random.random() < self.PURGE_PROBABILITY:
+            connection.execute('DELETE FROM order_event WHERE created < ?', (now - self.retention,))
+
+    def subscribed(self):
+        self._wake.set()
+        if self._poller is None:
+            with self._poller_lock:
+                if self._poller is None:
+                    self._poller = threading.Thread(target=self.poll, name='order-events', daemon=True)
+                    self._poller.start()
+
+    def poll(self):
+        connection = self.connection()
+        last_id = connection.execute('SELECT coalesce(max(id), 0) FROM order_event').fetchone()[0]
+        while True:
+            if not broker.has_subscribers():
+                # Sleep until the next subscriber instead of polling for nobody;
+                # events published meanwhile are skipped, as no one could see them.
+                self._wake.clear()
+                if not broker.has_subscribers():
+                    self._wake.wait()
+                last_id = connection.execute('SELECT coalesce(max(id), 0) FROM order_event').fetchone()[0]
+            rows = connection.execute(
+                'SELECT id, payload FROM order_event WHERE id > ? ORDER BY id LIMIT 1000', (last_id,),
+            ).fetchall()
+            for event_id, payload in rows:
+                broker.deliver({'id': event_id, **json.loads(payload)})
+                last_id = event_id
+            if len(rows) < 1000:
+                time.sleep(self.poll_interval)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_event_backend():
+    """Return the backend configured by EVENTS_BACKEND, built on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'EVENTS_BACKEND', {'BACKEND': 'LittleLemonDRF.events.LocalEventBackend'})
+                try:
+                    backend = import_string(config['BACKEND'])
+                except (ImportError, KeyError) as exc:
+                    raise ImproperlyConfigured(f'Invalid EVENTS_BACKEND: {exc}')
+                _backend = backend(**config.get('OPTIONS', {}))
+    return _backend
+
+
+def format_sse(event):
+    return f'id: {event["id"]}\nevent: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+
+async def event_stream(keys, last_id=None):
+    """Yield the server-sent events visible under ``keys``, resuming after ``last_id``.
+
+    A comment line is sent every EVENTS_HEARTBEAT seconds of silence so
+    proxies keep the connection open. The subscription lives as long as the
+    stream is iterated; the server closes the iterator when the client goes.
+    """
+    subscriber = broker.subscribe(keys)
+    try:
+        yield 'retry: 3000\n\n'
+        if last_id is not None:
+            for event in broker.since(last_id, keys):
+                last_id = event['id']
+                yield format_sse(event)
+        while not subscriber.lost:
+            events = await subscriber.get(EVENTS_HEARTBEAT)
+            if not events:
+                yield ': keep-alive\n\n'
+            for event in events:
+                if last_id is None or event['id'] > last_id:
+                    yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+async def wait_for_events(keys, since, timeout):
+    """Return the events after ``since`` visible under ``keys``, waiting up to ``timeout`` seconds for one."""
+    # Subscribe before looking at the buffer so nothing slips in between.
+    subscriber = broker.subscribe(keys)
+    try:
+        if since is None:
+            since = broker.last_id()
+        events = broker.since(since, keys)
+        if not events:
+            events = await subscriber.get(timeout)
+        return [event for event in events if event['id'] > since]
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+CENT = Decimal('0.01')
+
+# Upper bounds of the price histogram buckets; the last bucket is open-ended.
+MENU_PRICE_BUCKETS = [
+    Decimal(str(edge)).quantize(CENT) for edge in getattr(settings, 'MENU_PRICE_BUCKETS', [5, 10, 20, 50])
+]
+
+
+def price_bucket():
+    """The index of a menu item's price bucket, as an expression; buckets are ``[min, max)``."""
+    return Case(
+        *(When(price__lt=edge, then=Value(index)) for index, edge in enumerate(MENU_PRICE_BUCKETS)),
+        default=Value(len(MENU_PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def menu_facets(queryset):
+    """Count the menu items of ``queryset`` per category, featured flag and price bucket.
+
+    All three come from one ``GROUP BY category, featured, bucket`` query
+    whose few rows are summed up here, whatever filters or search
+    ``queryset`` carries.
+    """
+    rows = (
+        queryset.order_by()
+        .values('category_id', 'category__title', 'featured', bucket=price_bucket())
+        .annotate(count=Count('pk'))
+    )
+    total = featured = 0
+    categories = {}
+    buckets = [0] * (len(MENU_PRICE_BUCKETS) + 1)
+    for row in rows:
+        count = row['count']
+        total += count
+        if row['featured']:
+            featured += count
+        category = categories.setdefault(
+            row['category_id'], {'id': row['category_id'], 'title': row['category__title'], 'count': 0},
+        )
+        category['count'] += count
+        buckets[row['bucket']] += count
+
+    edges = [None, *(str(edge) for edge in MENU_PRICE_BUCKETS), None]
+    return {
+        'count': total,
+        'categories': sorted(categories.values(), key=lambda category: (category['title'], category['id'])),
+        'featured': featured,
+        'price': [
+            {'min': edges[index], 'max': edges[index + 1], 'count': count}
+            for index, count in enumerate(buckets)
+        ],
+    }
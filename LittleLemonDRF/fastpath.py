@@ -0,0 +1,167 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .performance import timed_serialization
+from .serializers import related_items
+
+# to_representation() methods that return database values unchanged.
+_IDENTITY = {
+    serializers.BooleanField.to_representation,
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+}
+
+
+class ValuesSerializer:
+    """Render ``values()`` rows exactly as a ModelSerializer renders instances.
+
+    Built from a (possibly sparse) serializer, it collects the columns every
+    field reads, keeps only the ``to_representation`` calls that change a
+    value (decimals, dates) and fills nested lists from one extra ``values()``
+    query per relation. No model instances or per-field ``get_attribute``
+    calls are involved, which is most of the cost of serializing a page.
+    """
+
+    def __init__(self, model, prefix=''):
+        self.model = model
+        self.prefix = prefix
+        self.columns = []
+        # (field name, column, to_representation or None, nested ValuesSerializer or None, is a list)
+        self.fields = []
+        # (field name, reverse relation, ValuesSerializer of the related rows)
+        self.many = []
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """Return a ValuesSerializer for ``serializer``, or None if a field cannot be read from columns."""
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        values = cls(serializer.Meta.model)
+        return values if values.compile(serializer) else None
+
+    def column(self, name):
+        name = self.prefix + name
+        if name not in self.columns:
+            self.columns.append(name)
+        return name
+
+    def compile(self, serializer):
+        opts = self.model._meta
+        # The primary key groups nested lists and is the keyset tiebreaker.
+        self.column(opts.pk.attname)
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                return False
+
+            if isinstance(field, serializers.ListSerializer):
+                relation = next(
+                    (rel for rel in opts.related_objects if rel.get_accessor_name() == field.source), None
+                )
+                child = ValuesSerializer(relation.related_model) if relation is not None else None
+                if child is None or self.prefix or not child.compile(field.child):
+                    return False
+                child.column(relation.field.attname)
+                self.many.append((field.field_name, relation, child))
+                self.fields.append((field.field_name, self.column(opts.pk.attname), None, child, True))
+                continue
+
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return False
+            if isinstance(field, serializers.BaseSerializer):
+                if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                    return False
+                nested = ValuesSerializer(model_field.related_model, f'{self.prefix}{model_field.name}__')
+                if not nested.compile(field) or nested.many:
+                    return False
+                self.fields.append((field.field_name, self.column(model_field.attname), None, nested, False))
+                self.columns.extend(column for column in nested.columns if column not in self.columns)
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and model_field.many_to_one:
+                convert = field.pk_field.to_representation if field.pk_field is not None else None
+                self.fields.append((field.field_name, self.column(model_field.attname), convert, None, False))
+            elif model_field.is_relation or not model_field.concrete:
+                return False
+            else:
+                convert = None if field.to_representation.__func__ in _IDENTITY else field.to_representation
+                self.fields.append((field.field_name, self.column(model_field.attname), convert, None, False))
+        return True
+
+    def values(self, queryset):
+        """``queryset`` as ``values()`` rows with every column read here and the ordering columns."""
+        ordering = [
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str) and name.lstrip('-') != 'pk'
+        ]
+        names = dict.fromkeys([*self.columns, *ordering])
+        return queryset.select_related(None).prefetch_related(None).values(*names)
+
+    def build(self, row, groups):
+        item = {}
+        for name, column, convert, nested, many in self.fields:
+            value = row[column]
+            if many:
+                # A nested list, filled in once its rows are loaded.
+                item[name] = groups[name].setdefault(value, [])
+            elif value is None:
+                item[name] = None
+            elif nested is not None:
+                item[name] = nested.build(row, None)
+            elif convert is None:
+                item[name] = value
+            else:
+                item[name] = convert(value)
+        return item
+
+    def _serialize(self, rows):
+        # Yields the querysets of nested rows and receives them evaluated,
+        # so serialize() and aserialize() share everything but the fetching.
+        groups = {name: {} for name, _, _ in self.many}
+        data = [self.build(row, groups) for row in rows]
+        for name, relation, child in self.many:
+            group = groups[name]
+            if not group:
+                continue
+            fk = relation.field.attname
+            children = yield child.values(related_items(relation).filter(**{f'{fk}__in': list(group)}))
+            items = yield from child._serialize(children)
+            for row, item in zip(children, items):
+                group[row[fk]].append(item)
+        return data
+
+    def serialize(self, rows):
+        # Only the steps count as serialization time, not fetching their rows.
+        step = timed_serialization(self._serialize(rows).send)
+        try:
+            queryset = step(None)
+            while True:
+                queryset = step(list(queryset))
+        except StopIteration as done:
+            return done.value
+
+    async def aserialize(self, rows):
+        step = timed_serialization(self._serialize(rows).send)
+        try:
+            queryset = step(None)
+            while True:
+                queryset = step([row async for row in queryset])
+        except StopIteration as done:
+            return done.value
+
+
+class ValuesListMixin:
+    """Serve ``list`` through ValuesSerializer, falling back to the serializer when it cannot."""
+
+    def list(self, request, *args, **kwargs):
+        values = ValuesSerializer.for_serializer(self.get_serializer())
+        if values is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = values.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values.serialize(page))
+        return Response(values.serialize(queryset))
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import record_orders
+from .events import order_event, publish
+from .models import Cart, CheckoutTicket, MenuItem, Order, OrderItem
+from .orders import CheckoutConflict
+
+ORDER_INGESTION_MODE = getattr(settings, 'ORDER_INGESTION_MODE', 'sync')
+ORDER_QUEUE_BATCH_SIZE = getattr(settings, 'ORDER_QUEUE_BATCH_SIZE', 100)
+
+if ORDER_INGESTION_MODE not in ('sync', 'queued'):
+    raise ImproperlyConfigured(f"ORDER_INGESTION_MODE must be 'sync' or 'queued', not {ORDER_INGESTION_MODE!r}.")
+
+
+def enqueue_order(user):
+    """Move the user's cart into a pending CheckoutTicket atomically.
+
+    This is the whole of a queued checkout: one INSERT of the cart snapshot
+    and one DELETE, with the same guard against parallel checkouts as
+    place_order. Returns None when the cart is empty.
+    """
+    with transaction.atomic():
+        lines = list(
+            Cart.objects.select_for_update()
+            .filter(user=user)
+            .values_list('pk', 'menuitem_id', 'quantity', 'unit_price', 'price')
+        )
+        if not lines:
+            return None
+
+        ticket = CheckoutTicket.objects.create(
+            user=user,
+            total=sum(line[4] for line in lines),
+            lines=[[menuitem_id, quantity, str(unit_price), str(price)] for _, menuitem_id, quantity, unit_price, price in lines],
+        )
+        deleted, _ = Cart.objects.filter(pk__in=[line[0] for line in lines]).delete()
+        if deleted != len(lines):
+            raise CheckoutConflict
+    return ticket
+
+
+def process_tickets(batch_size=ORDER_QUEUE_BATCH_SIZE):
+    """Turn up to ``batch_size`` pending tickets, oldest first, into orders.
+
+    The whole batch is one transaction: the orders, their items, the sales
+    summaries and the ticket rows are written with a handful of bulk
+    statements, and a worker that dies part way leaves the tickets pending
+    for the next one. Concurrent workers take turns on SQLite and skip each
+    other's locked tickets elsewhere. Each order is dated the day of its
+    checkout. Tickets that cannot become orders (see ticket_error) are
+    marked failed rather than failing the batch. Returns the tickets
+    processed.
+    """
+    with transaction.atomic():
+        tickets = list(
+            CheckoutTicket.objects.select_for_update(skip_locked=True)
+            .filter(status=CheckoutTicket.PENDING)
+            .order_by('pk')[:batch_size]
+        )
+        if not tickets:
+            return []
+
+        menuitem_ids = {line[0] for ticket in tickets for line in ticket.lines}
+        prices = dict(MenuItem.objects.filter(pk__in=menuitem_ids).values_list('pk', 'price'))
+        now = timezone.now()
+        accepted = []
+        for ticket in tickets:
+            ticket.processed = now
+            ticket.error = ticket_error(ticket, prices)
+            if ticket.error:
+                ticket.status = CheckoutTicket.FAILED
+            else:
+                accepted.append(ticket)
+
+        orders = Order.objects.bulk_create(
+            Order(user_id=ticket.user_id, total=ticket.total, date=timezone.localdate(ticket.created), status=False)
+            for ticket in accepted
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, menuitem_id=menuitem_id, quantity=quantity,
+                unit_price=Decimal(unit_price), price=Decimal(price),
+            )
+            for ticket, order in zip(accepted, orders)
+            for menuitem_id, quantity, unit_price, price in ticket.lines
+        )
+        record_orders(
+            (order, [(menuitem_id, quantity, Decimal(price)) for menuitem_id, quantity, _, price in ticket.lines])
+            for ticket, order in zip(accepted, orders)
+        )
+
+        events = []
+        for ticket, order in zip(accepted, orders):
+            ticket.status = CheckoutTicket.DONE
+            ticket.order = order
+            # Lets a client that only knows its ticket spot its order.
+            events.append({**order_event('order.created', order.pk, order.user_id, None, False), 'ticket': ticket.pk})
+        CheckoutTicket.objects.bulk_update(tickets, ['status', 'order', 'error', 'processed'])
+        publish(*events)
+    return tickets
+
+
+def ticket_error(ticket, prices):
+    """Why ``ticket`` cannot become an order, given ``{menu item id: current price}``; '' if it can.
+
+    The customer agreed to the prices of their cart, so a ticket whose menu
+    prices changed before it was processed fails instead of charging them.
+    """
+    if not ticket.lines:
+        return 'The cart was empty.'
+    for menuitem_id, _, unit_price, _ in ticket.lines:
+        if menuitem_id not in prices:
+            return 'A menu item in the cart no longer exists.'
+        if prices[menuitem_id] != Decimal(unit_price):
+            return 'The price of a menu item changed since checkout.'
+    return ''
@@ -0,0 +1,407 @@
+import asyncio
+import itertools
+import json
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date, timedelta
+from unittest import mock
+
+import django
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+
+from LittleLemonDRF.models import Cart, Category, MenuItem, Order
+from LittleLemonDRF.roles import DELIVERY_CREW, MANAGER
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class Scenario:
+    """One request shape to time.
+
+    ``path`` and ``data`` may contain ``{placeholders}`` filled from the
+    resolved fixtures and from whatever ``setup`` returns; ``data`` may also
+    be a callable that builds the body from those values. Write scenarios
+    run each request in a transaction that is rolled back afterwards, so the
+    dataset is the same for every iteration and every run.
+    """
+
+    def __init__(self, name, role, method, path, data=None, content_type='application/json', write=False, setup=None):
+        self.name = name
+        self.role = role
+        self.method = method
+        self.path = path
+        self.data = data
+        self.content_type = content_type
+        self.write = write
+        self.setup = setup
+
+    def request(self, values):
+        path = self.path.format(**values)
+        if self.data is None:
+            return path, ''
+        if callable(self.data):
+            return path, self.data(values)
+        if isinstance(self.data, str):
+            return path, self.data.format(**values)
+        return path, json.dumps({key: value.format(**values) if isinstance(value, str) else value
+                                 for key, value in self.data.items()})
+
+
+def _add_cart_line(fixtures):
+    Cart.objects.update_or_create(
+        user_id=fixtures['customer_id'], menuitem_id=fixtures['menuitem_id'],
+        defaults={'quantity': 2, 'unit_price': fixtures['price'], 'price': fixtures['price'] * 2},
+    )
+
+
+def _new_menu_item(fixtures):
+    item = MenuItem.objects.create(title='Benchmark dish', price=1, featured=False, category_id=fixtures['category_id'])
+    return {'new_menuitem_id': item.pk}
+
+
+def _import_rows(values, count=100):
+    return '\n'.join(
+        json.dumps({'title': f'Imported dish {index}', 'price': '9.99', 'featured': False, 'category': values['category_id']})
+        for index in range(count)
+    )
+
+
+def _bulk_assignments(values, count=100):
+    orders = Order.objects.order_by('-pk').values_list('pk', flat=True)[:count]
+    return json.dumps({'assignments': [{'order': order_id, 'delivery_crew': values['crew_id']} for order_id in orders]})
+
+
+def _crew_order_status(values, count=50):
+    orders = Order.objects.filter(delivery_crew_id=values['crew_id']).order_by('-pk').values_list('pk', flat=True)[:count]
+    return json.dumps({'orders': list(orders), 'status': True})
+
+
+SCENARIOS = [
+    Scenario('menu.list', 'anonymous', 'GET', '/api/menu-items'),
+    Scenario('menu.list.search', 'anonymous', 'GET', '/api/menu-items?search=lemon'),
+    Scenario('menu.list.filtered', 'anonymous', 'GET', '/api/menu-items?category={category_id}&ordering=-price'),
+    Scenario('menu.list.cursor', 'anonymous', 'GET', '/api/menu-items?pagination=cursor&ordering=price'),
+    Scenario('menu.list.deep-page', 'anonymous', 'GET', '/api/menu-items?page={deep_menu_page}'),
+    Scenario('menu.list.page-100', 'anonymous', 'GET', '/api/menu-items?page_size=100&ordering=title'),
+    Scenario('menu.detail', 'anonymous', 'GET', '/api/menu-items/{menuitem_id}'),
+    Scenario('menu.facets', 'anonymous', 'GET', '/api/menu-items/facets'),
+    Scenario('menu.facets.search', 'anonymous', 'GET', '/api/menu-items/facets?search=lemon&featured=true'),
+    Scenario('menu.create', 'manager', 'POST', '/api/menu-items',
+             {'title': 'Benchmark dish', 'price': '9.99', 'featured': False, 'category': '{category_id}'},
+             write=True),
+    Scenario('menu.update', 'manager', 'PATCH', '/api/menu-items/{menuitem_id}', {'price': '12.50'}, write=True),
+    Scenario('menu.delete', 'manager', 'DELETE', '/api/menu-items/{new_menuitem_id}', write=True, setup=_new_menu_item),
+    Scenario('menu.export', 'manager', 'GET', '/api/menu-items/export'),
+    Scenario('menu.import', 'manager', 'POST', '/api/menu-items/import', _import_rows,
+             content_type='application/x-ndjson', write=True),
+    Scenario('categories.export', 'manager', 'GET', '/api/categories/export'),
+    Scenario('categories.import', 'manager', 'POST', '/api/categories/import', 'slug,title\nbenchmark,Benchmark\n',
+             content_type='text/csv', write=True),
+    Scenario('groups.manager.list', 'manager', 'GET', '/api/groups/manager/users'),
+    Scenario('groups.manager.add', 'manager', 'POST', '/api/groups/manager/users',
+             {'user_id': '{customer_id}'}, write=True),
+    Scenario('groups.manager.remove', 'manager', 'DELETE', '/api/groups/manager/users/{manager_id}', write=True),
+    Scenario('groups.crew.list', 'manager', 'GET', '/api/groups/delivery-crew/users'),
+    Scenario('groups.crew.add', 'manager', 'POST', '/api/groups/delivery-crew/users',
+             {'user_id': '{customer_id}'}, write=True),
+    Scenario('groups.crew.remove', 'manager', 'DELETE', '/api/groups/delivery-crew/users/{crew_id}', write=True),
+    Scenario('cart.list', 'customer', 'GET', '/api/cart/menu-items', setup=_add_cart_line, write=True),
+    Scenario('cart.add', 'customer', 'POST', '/api/cart/menu-items',
+             {'menuitem': '{menuitem_id}', 'quantity': 1}, write=True),
+    Scenario('cart.clear', 'customer', 'DELETE', '/api/cart/menu-items', setup=_add_cart_line, write=True),
+    Scenario('orders.list.customer', 'customer', 'GET', '/api/orders'),
+    Scenario('orders.list.crew', 'crew', 'GET', '/api/orders'),
+    Scenario('orders.list.manager', 'manager', 'GET', '/api/orders'),
+    Scenario('orders.list.manager.cursor', 'manager', 'GET', '/api/orders?pagination=cursor'),
+    Scenario('orders.list.manager.deep-page', 'manager', 'GET', '/api/orders?page={deep_order_page}'),
+    Scenario('orders.list.manager.page-100', 'manager', 'GET', '/api/orders?page_size=100'),
+    Scenario('orders.list.manager.expanded', 'manager', 'GET',
+             '/api/orders?page_size=100&expand=order_items.menuitem.category'),
+    Scenario('orders.detail', 'customer', 'GET', '/api/orders/{order_id}'),
+    Scenario('orders.checkout', 'customer', 'POST', '/api/orders', setup=_add_cart_line, write=True),
+    Scenario('orders.assign', 'manager', 'PATCH', '/api/orders/{order_id}',
+             {'delivery_crew_id': '{crew_id}'}, write=True),
+    Scenario('orders.deliver', 'crew', 'PATCH', '/api/orders/{crew_order_id}', {'status': True}, write=True),
+    Scenario('orders.delete', 'manager', 'DELETE', '/api/orders/{order_id}', write=True),
+    Scenario('orders.dispatch', 'manager', 'POST', '/api/orders/dispatch', {'limit': 100}, write=True),
+    Scenario('orders.assign.bulk', 'manager', 'POST', '/api/orders/assign', _bulk_assignments, write=True),
+    Scenario('orders.status.bulk', 'crew', 'PATCH', '/api/orders/status', _crew_order_status, write=True),
+    Scenario('orders.export', 'manager', 'GET', '/api/orders/export?start={week_ago}'),
+    Scenario('analytics.sales', 'manager', 'GET', '/api/analytics/sales?start={year_ago}'),
+    Scenario('analytics.top-items', 'manager', 'GET', '/api/analytics/top-items?start={year_ago}&by=revenue'),
+    Scenario('performance.stats', 'manager', 'GET', '/api/performance/stats'),
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every LittleLemonDRF endpoint against the current database (see generate_dataset) and report '
+        'throughput, latency percentiles and query counts, optionally saving or comparing a JSON baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario.')
+        parser.add_argument('--only', action='append', default=[], help='Run scenarios whose name contains this.')
+        parser.add_argument('--save', metavar='PATH', help='Write the results to a JSON baseline.')
+        parser.add_argument('--compare', metavar='PATH', help='Compare the results with a saved baseline.')
+        parser.add_argument(
+            '--max-regression', type=float, metavar='PERCENT',
+            help='With --compare, fail if any scenario p50 is this much slower than the baseline.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=0, metavar='N',
+            help=(
+                'Also send the read scenarios N at a time through the WSGI application (N threads) and the '
+                'ASGI application (N coroutines, needs httpx), reported as <scenario>@wsgi and <scenario>@asgi.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or any(part in scenario.name for part in options['only'])
+        ]
+        if not scenarios:
+            raise CommandError('No scenario matches --only.')
+        if options['concurrency'] and httpx is None:
+            raise CommandError('--concurrency needs httpx to drive the ASGI application.')
+
+        fixtures = self.resolve_fixtures()
+        headers = self.auth_headers(fixtures)
+        clients = {role: Client(headers=role_headers) for role, role_headers in headers.items()}
+        baseline = self.load_baseline(options['compare']) if options['compare'] else None
+
+        results = {}
+        # Throttling would turn most of the run into 429s, and the test
+        # client's host has to be accepted whatever ALLOWED_HOSTS says.
+        with mock.patch.object(APIView, 'throttle_classes', []), override_settings(ALLOWED_HOSTS=['*']):
+            for scenario in scenarios:
+                result = results[scenario.name] = self.run_scenario(scenario, clients[scenario.role], fixtures, options)
+                self.report(scenario.name, result, baseline)
+                # Writes are rolled back one request at a time, which
+                # concurrent requests cannot share.
+                if options['concurrency'] and not scenario.write and scenario.setup is None:
+                    for server, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                        name = f'{scenario.name}@{server}'
+                        results[name] = run(scenario, headers[scenario.role], fixtures, result['queries'], options)
+                        self.report(name, results[name], baseline)
+
+        if options['save']:
+            with open(options['save'], 'w') as fp:
+                json.dump({'meta': self.meta(), 'results': results}, fp, indent=2, sort_keys=True)
+            self.stdout.write(f'Saved baseline to {options["save"]}.')
+
+        if baseline is not None and options['max_regression'] is not None:
+            regressed = [
+                name for name, result in results.items()
+                if name in baseline and self.change(baseline[name]['p50_ms'], result['p50_ms']) > options['max_regression']
+            ]
+            if regressed:
+                raise CommandError(f'p50 regressed by more than {options["max_regression"]}%: {", ".join(regressed)}')
+
+    def resolve_fixtures(self):
+        manager = User.objects.filter(groups__name=MANAGER).order_by('pk').first()
+        crew_order = Order.objects.filter(delivery_crew__groups__name=DELIVERY_CREW).order_by('pk').first()
+        order = Order.objects.filter(user__groups__isnull=True).order_by('-pk').first()
+        menuitem = MenuItem.objects.order_by('pk').first()
+        if manager is None or crew_order is None or order is None or menuitem is None:
+            raise CommandError(
+                'The database needs a manager, a delivery crew member with an order, a customer with an order '
+                'and a menu item; run generate_dataset first.'
+            )
+
+        today = date.today()
+        return {
+            'manager_id': manager.pk,
+            'crew_id': crew_order.delivery_crew_id,
+            'crew_order_id': crew_order.pk,
+            'customer_id': order.user_id,
+            'order_id': order.pk,
+            'menuitem_id': menuitem.pk,
+            'price': menuitem.price,
+            'category_id': Category.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'deep_menu_page': max(1, MenuItem.objects.count() // 10 // 2),
+            'deep_order_page': max(1, Order.objects.count() // 10 // 2),
+            'week_ago': (today - timedelta(days=7)).isoformat(),
+            'year_ago': (today - timedelta(days=365)).isoformat(),
+        }
+
+    def auth_headers(self, fixtures):
+        headers = {'anonymous': {}}
+        for role in ('manager', 'crew', 'customer'):
+            token, _ = Token.objects.get_or_create(user_id=fixtures[f'{role}_id'])
+            headers[role] = {'Authorization': f'Token {token.key}'}
+        return headers
+
+    def run_scenario(self, scenario, client, fixtures, options):
+        timings, queries, errors = [], [], 0
+        for iteration in range(options['warmup'] + options['requests']):
+            elapsed, query_count, status_code = self.time_request(scenario, client, fixtures)
+            if iteration < options['warmup']:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(query_count)
+            if status_code >= 400:
+                errors += 1
+
+        queries.sort()
+        return self.summarize(timings, errors, sum(timings) / 1000, percentile(queries, 0.50))
+
+    @staticmethod
+    def summarize(timings, errors, seconds, queries):
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'errors': errors,
+            'rps': round(len(timings) / seconds, 1) if timings else 0.0,
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'queries': queries,
+        }
+
+    def run_wsgi(self, scenario, headers, fixtures, queries, options):
+        """Send the requests ``--concurrency`` at a time from threads, as a threaded WSGI server would."""
+        path, body = scenario.request(fixtures)
+        total = options['warmup'] + options['requests'] * options['concurrency']
+        counter = itertools.count()
+
+        def worker():
+            client = Client(headers=headers)
+            timings, errors = [], 0
+            try:
+                while (index := next(counter)) < total:
+                    start = time.perf_counter()
+                    response = client.generic(scenario.method, path, body, content_type=scenario.content_type)
+                    if response.streaming:
+                        for _ in response.streaming_content:
+                            pass
+                    if index >= options['warmup']:
+                        timings.append((time.perf_counter() - start) * 1000)
+                        errors += response.status_code >= 400
+            finally:
+                connections.close_all()
+            return timings, errors
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            start = time.perf_counter()
+            outcomes = list(pool.map(lambda _: worker(), range(options['concurrency'])))
+            seconds = time.perf_counter() - start
+        timings = [timing for outcome in outcomes for timing in outcome[0]]
+        return self.summarize(timings, sum(outcome[1] for outcome in outcomes), seconds, queries)
+
+    def run_asgi(self, scenario, headers, fixtures, queries, options):
+        """Send the requests ``--concurrency`` at a time from coroutines to the ASGI application."""
+        from LittleLemon.asgi import application
+
+        path, body = scenario.request(fixtures)
+        total = options['warmup'] + options['requests'] * options['concurrency']
+        counter = itertools.count()
+
+        async def run():
+            timings, errors = [], 0
+            transport = httpx.ASGITransport(app=application)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver', headers=headers) as client:
+                async def worker():
+                    nonlocal errors
+                    while (index := next(counter)) < total:
+                        start = time.perf_counter()
+                        response = await client.request(
+                            scenario.method, path, content=body or None,
+                            headers={'Content-Type': scenario.content_type} if body else None,
+                        )
+                        if index >= options['warmup']:
+                            timings.append((time.perf_counter() - start) * 1000)
+                            errors += response.status_code >= 400
+
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+                seconds = time.perf_counter() - start
+            # The ORM ran in asgiref's sync thread; don't leave its connection open.
+            await sync_to_async(connections.close_all)()
+            return timings, errors, seconds
+
+        timings, errors, seconds = asyncio.run(run())
+        return self.summarize(timings, errors, seconds, queries)
+
+    def time_request(self, scenario, client, fixtures):
+        query_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        with transaction.atomic() if scenario.write else nullcontext():
+            values = dict(fixtures)
+            if scenario.setup is not None:
+                values.update(scenario.setup(fixtures) or {})
+            path, body = scenario.request(values)
+
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                response = client.generic(scenario.method, path, body, content_type=scenario.content_type)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = time.perf_counter() - start
+
+            if scenario.write:
+                transaction.set_rollback(True)
+        return elapsed, query_count, response.status_code
+
+    def report(self, name, result, baseline):
+        line = (
+            f'{name:<32} {result["rps"]:>8.1f} req/s  p50 {result["p50_ms"]:>8.2f}ms  '
+            f'p95 {result["p95_ms"]:>8.2f}ms  p99 {result["p99_ms"]:>8.2f}ms  {result["queries"]:>3} queries'
+        )
+        if result['errors']:
+            line += self.style.ERROR(f'  {result["errors"]} errors')
+        if baseline is not None and name in baseline:
+            change = self.change(baseline[name]['p50_ms'], result['p50_ms'])
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            line += '  ' + style(f'p50 {change:+.1f}%')
+            if result['queries'] != baseline[name]['queries']:
+                line += f' queries {baseline[name]["queries"]} -> {result["queries"]}'
+        self.stdout.write(line)
+
+    @staticmethod
+    def change(before, after):
+        return (after - before) / before * 100 if before else 0.0
+
+    @staticmethod
+    def load_baseline(path):
+        try:
+            with open(path) as fp:
+                return json.load(fp)['results']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+    @staticmethod
+    def meta():
+        return {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'menu_items': MenuItem.objects.count(),
+            'orders': Order.objects.count(),
+        }
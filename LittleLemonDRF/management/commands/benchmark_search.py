@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from LittleLemonDRF.models import MenuItem
+from LittleLemonDRF.search import MenuItemSearchFilter
+from LittleLemonDRF.views import MenuItemViewSet
+
+# Titles are generated as "<style> <dish> <number>" (see generate_dataset).
+TERMS = ['lem des', '4242', 'spicy bruschetta 77', 'bruschetta']
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ?search= on the menu with MenuItemSearchFilter (FTS5) and DRF's SearchFilter (icontains), "
+        'on a scratch copy of the SQLite database holding a catalog of --menu-items items.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=100000, help='Catalog size to search.')
+        parser.add_argument('--page-size', type=int, default=10, help='Rows loaded after the count.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed searches per term and filter.')
+        parser.add_argument('--term', action='append', default=[], help=f'Search for this instead of {TERMS}.')
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('The search benchmark only applies to SQLite.')
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Everything below runs against the copy; the catalog it may
+            # regenerate never touches the real database.
+            database = os.path.join(directory, 'search.sqlite3')
+            source.close()
+            with sqlite3.connect(str(source.settings_dict['NAME'])) as origin, sqlite3.connect(database) as copy:
+                origin.backup(copy)
+            original_name = source.settings_dict['NAME']
+            source.settings_dict['NAME'] = database
+            try:
+                self.benchmark(options)
+            finally:
+                source.close()
+                source.settings_dict['NAME'] = original_name
+
+    def benchmark(self, options):
+        if MenuItem.objects.count() != options['menu_items']:
+            self.stdout.write(f'Generating a catalog of {options["menu_items"]} menu items in the scratch copy...')
+            call_command(
+                'generate_dataset', clear=True, menu_items=options['menu_items'], orders=0,
+                managers=0, delivery_crew=0, customers=0, carts=0, stdout=StringIO(),
+            )
+
+        view = MenuItemViewSet()
+        filters = [('icontains', SearchFilter()), ('fts5', MenuItemSearchFilter())]
+        for term in options['term'] or TERMS:
+            request = Request(APIRequestFactory().get('/', {'search': term}))
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{term!r}:'))
+            baseline = None
+            for name, search_filter in filters:
+                queryset = search_filter.filter_queryset(request, MenuItem.objects.all(), view)
+                count = queryset.count()
+
+                def search():
+                    # What a list request does: count the matches, load a page.
+                    queryset.count()
+                    list(queryset[:options['page_size']])
+
+                seconds = self.time(search, options['repeat'])
+                line = f'  {name:<10} {seconds * 1000:>8.2f}ms  {count:>7} matches'
+                if baseline is not None:
+                    line += (self.style.SUCCESS if seconds < baseline else self.style.ERROR)(f'  {baseline / seconds:.1f}x')
+                self.stdout.write(line)
+                baseline = seconds
+
+    @staticmethod
+    def time(function, repeat):
+        function()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2]
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from LittleLemonDRF.fastpath import ValuesSerializer
+from LittleLemonDRF.models import MenuItem, Order
+from LittleLemonDRF.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from LittleLemonDRF.serializers import MenuItemSerializer, OrderSerializer, sparse_queryset
+
+# (name, serializer class, queryset, query string the serializer is built for)
+CASES = [
+    ('menu', MenuItemSerializer, MenuItem.objects.order_by('title'), ''),
+    ('menu.expanded', MenuItemSerializer, MenuItem.objects.order_by('title'), 'expand=category'),
+    ('orders', OrderSerializer, Order.objects.order_by('-date'), ''),
+    ('orders.sparse', OrderSerializer, Order.objects.order_by('-date'), 'fields=id,total,order_items.menuitem'),
+    ('orders.expanded', OrderSerializer, Order.objects.order_by('-date'), 'expand=order_items.menuitem.category'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare loading and serializing a page through ModelSerializer with the values() read path, '
+        'and the JSON renderer with FastJSONRenderer and MessagePackRenderer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=30, help='Timed pages per case.')
+        parser.add_argument('--only', action='append', default=[], help='Run cases whose name contains this.')
+
+    def handle(self, *args, **options):
+        cases = [case for case in CASES if not options['only'] or any(part in case[0] for part in options['only'])]
+        if not cases:
+            raise CommandError('No case matches --only.')
+        if not Order.objects.exists() or not MenuItem.objects.exists():
+            raise CommandError('The database has no orders or menu items; run generate_dataset first.')
+
+        renderers = [('json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        for name, serializer_class, queryset, query in cases:
+            request = Request(APIRequestFactory().get(f'/?{query}'))
+            context = {'request': request}
+            serializer = serializer_class(context=context)
+            values = ValuesSerializer.for_serializer(serializer)
+            page = slice(0, options['rows'])
+
+            def model_path():
+                return serializer_class(list(sparse_queryset(queryset, serializer)[page]), many=True, context=context).data
+
+            def values_path():
+                return values.serialize(values.values(queryset)[page])
+
+            expected = model_path()
+            if JSONRenderer().render(values_path()) != JSONRenderer().render(expected):
+                raise CommandError(f'{name}: the values() read path renders differently from {serializer_class.__name__}.')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({options["rows"]} rows{", ?" + query if query else ""}):'))
+            baseline = self.report('ModelSerializer', self.time(model_path, options['repeat']), options['rows'])
+            self.report('values()', self.time(values_path, options['repeat']), options['rows'], baseline)
+            baseline = None
+            for renderer_name, renderer in renderers:
+                seconds = self.time(lambda: renderer.render(expected), options['repeat'])
+                size = len(renderer.render(expected))
+                baseline = self.report(f'render {renderer_name}', seconds, options['rows'], baseline, size)
+
+    @staticmethod
+    def time(function, repeat):
+        function()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2]
+
+    def report(self, label, seconds, rows, baseline=None, size=None):
+        line = f'  {label:<16} {seconds * 1000:>8.2f}ms/page  {rows / seconds:>10.0f} rows/s'
+        if size is not None:
+            line += f'  {size:>8} bytes'
+        if baseline is not None:
+            line += self.style.SUCCESS(f'  {baseline / seconds:.1f}x')
+        self.stdout.write(line)
+        return seconds if baseline is None else baseline
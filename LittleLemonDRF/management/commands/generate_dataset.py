@@ -0,0 +1,168 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from LittleLemonDRF.caching import bump_catalog_version
+from LittleLemonDRF.models import Cart, Category, DailySales, MenuItem, MenuItemDailySales, Order, OrderItem
+from LittleLemonDRF.roles import DELIVERY_CREW, MANAGER
+
+USERNAME_PREFIX = 'bench-'
+PASSWORD = 'lemon-bench'
+
+DISHES = [
+    'Bruschetta', 'Greek Salad', 'Lemon Dessert', 'Grilled Fish', 'Pasta', 'Moussaka', 'Falafel',
+    'Souvlaki', 'Baklava', 'Hummus', 'Risotto', 'Lamb Chops', 'Calamari', 'Tiramisu', 'Gnocchi',
+]
+STYLES = ['Classic', 'Spicy', 'Smoked', 'Roasted', 'Garden', 'Seaside', 'Rustic', 'Citrus', 'Herbed', 'Golden']
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a reproducible synthetic dataset for load tests and benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--menu-items', type=int, default=20000)
+        parser.add_argument('--managers', type=int, default=5)
+        parser.add_argument('--delivery-crew', type=int, default=50)
+        parser.add_argument('--customers', type=int, default=2000)
+        parser.add_argument('--carts', type=int, default=500, help='Customers with a non-empty cart.')
+        parser.add_argument('--orders', type=int, default=200000)
+        parser.add_argument('--max-order-lines', type=int, default=5)
+        parser.add_argument('--days', type=int, default=365, help='Orders are spread over this many past days.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete orders, carts, the catalog and previously generated users first.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if not options['clear'] and (MenuItem.objects.exists() or Order.objects.exists()):
+            raise CommandError('The database already has menu items or orders; pass --clear to replace them.')
+        if options['orders'] and not (options['customers'] and options['menu_items']):
+            raise CommandError('Orders need at least one customer and one menu item.')
+
+        with transaction.atomic():
+            if options['clear']:
+                self.clear()
+            categories = self.create_categories(options['categories'])
+            menu = self.create_menu_items(categories, options['menu_items'])
+            managers = self.create_users('manager', options['managers'], MANAGER)
+            crew = self.create_users('crew', options['delivery_crew'], DELIVERY_CREW)
+            customers = self.create_users('customer', options['customers'], None)
+            self.create_carts(customers[:options['carts']], menu, options['max_order_lines'])
+            self.create_orders(customers, crew, menu, options)
+
+        call_command('rebuild_sales_summaries', stdout=self.stdout)
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(categories)} categories, {len(menu)} menu items, '
+            f'{len(managers) + len(crew) + len(customers)} users and {options["orders"]} orders. '
+            f'Generated users log in with the password "{PASSWORD}".'
+        ))
+
+    def clear(self):
+        self.stdout.write('Clearing existing data...')
+        OrderItem.objects.all().delete()
+        # With the items gone nothing cascades from Order, so skip the
+        # collector, which would load every order into memory first.
+        Order.objects.all()._raw_delete(Order.objects.db)
+        Cart.objects.all().delete()
+        DailySales.objects.all().delete()
+        MenuItemDailySales.objects.all().delete()
+        MenuItem.objects.all().delete()
+        Category.objects.all().delete()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def create_categories(self, count):
+        return Category.objects.bulk_create(
+            Category(slug=f'category-{index}', title=f'Category {index}') for index in range(1, count + 1)
+        )
+
+    def create_menu_items(self, categories, count):
+        rng = self.rng
+        items = (
+            MenuItem(
+                title=f'{rng.choice(STYLES)} {rng.choice(DISHES)} {index}',
+                price=Decimal(rng.randint(200, 4000)) / 100,
+                featured=rng.random() < 0.1,
+                category=rng.choice(categories),
+            )
+            for index in range(1, count + 1)
+        )
+        MenuItem.objects.bulk_create(items, batch_size=self.batch_size)
+        self.stdout.write(f'Created {count} menu items.')
+        return list(MenuItem.objects.order_by('pk').values_list('pk', 'price'))
+
+    def create_users(self, kind, count, group_name):
+        # Hashing is deliberately slow, so every generated user shares one hash.
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (User(username=f'{USERNAME_PREFIX}{kind}-{index}', password=password) for index in range(1, count + 1)),
+            batch_size=self.batch_size,
+        )
+        users = list(
+            User.objects.filter(username__startswith=f'{USERNAME_PREFIX}{kind}-').order_by('pk').values_list('pk', flat=True)
+        )
+        if group_name is not None:
+            group, _ = Group.objects.get_or_create(name=group_name)
+            User.groups.through.objects.bulk_create(
+                (User.groups.through(user_id=user_id, group_id=group.pk) for user_id in users),
+                batch_size=self.batch_size,
+            )
+        self.stdout.write(f'Created {count} {kind} users.')
+        return users
+
+    def create_carts(self, customers, menu, max_lines):
+        carts = []
+        for user_id in customers:
+            for menuitem_id, unit_price in self.rng.sample(menu, self.rng.randint(1, max_lines)):
+                quantity = self.rng.randint(1, 3)
+                carts.append(Cart(
+                    user_id=user_id, menuitem_id=menuitem_id, quantity=quantity,
+                    unit_price=unit_price, price=unit_price * quantity,
+                ))
+        Cart.objects.bulk_create(carts, batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(carts)} cart lines.')
+
+    def create_orders(self, customers, crew, menu, options):
+        rng = self.rng
+        today = date.today()
+        remaining = options['orders']
+        while remaining > 0:
+            size = min(self.batch_size, remaining)
+            orders, lines = [], []
+            for _ in range(size):
+                picked = rng.sample(menu, rng.randint(1, options['max_order_lines']))
+                order_lines = [(menuitem_id, unit_price, rng.randint(1, 3)) for menuitem_id, unit_price in picked]
+                assigned = bool(crew) and rng.random() < 0.7
+                orders.append(Order(
+                    user_id=rng.choice(customers),
+                    delivery_crew_id=rng.choice(crew) if assigned else None,
+                    status=assigned and rng.random() < 0.6,
+                    total=sum(unit_price * quantity for _, unit_price, quantity in order_lines),
+                    date=today - timedelta(days=rng.randrange(options['days'])),
+                ))
+                lines.append(order_lines)
+
+            # SQLite returns the new primary keys, so items can point at them.
+            Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order_id=order.pk, menuitem_id=menuitem_id, quantity=quantity,
+                    unit_price=unit_price, price=unit_price * quantity,
+                )
+                for order, order_lines in zip(orders, lines)
+                for menuitem_id, unit_price, quantity in order_lines
+            )
+            remaining -= size
+            self.stdout.write(f'Created {options["orders"] - remaining} orders...')
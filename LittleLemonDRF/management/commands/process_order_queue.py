@@ -0,0 +1,91 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from LittleLemonDRF.ingestion import ORDER_QUEUE_BATCH_SIZE, process_tickets
+from LittleLemonDRF.models import CheckoutTicket
+
+
+def drain(batch_size, poll_interval, once, stop=lambda: False):
+    """Process tickets until ``stop()`` (or, with ``once``, the queue is empty); returns (done, failed)."""
+    done = failed = 0
+    while not stop():
+        try:
+            tickets = process_tickets(batch_size)
+        except OperationalError as exc:
+            # Another worker held the write lock past busy_timeout; the batch
+            # was rolled back, so just try again.
+            if 'locked' not in str(exc):
+                raise
+            continue
+        if not tickets:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        for ticket in tickets:
+            if ticket.status == CheckoutTicket.DONE:
+                done += 1
+            else:
+                failed += 1
+    connections.close_all()
+    return done, failed
+
+
+def _worker(batch_size, poll_interval, once, results):
+    # Finish the batch in hand on Ctrl+C / SIGTERM instead of dying mid-way.
+    stopping = []
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stopping.append(True))
+    results.put(drain(batch_size, poll_interval, once, stop=lambda: bool(stopping)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Turn the checkout tickets queued by ORDER_INGESTION_MODE = "queued" into orders, '
+        'in batches, with a pool of worker processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes.')
+        parser.add_argument('--batch-size', type=int, default=ORDER_QUEUE_BATCH_SIZE, help='Tickets per transaction.')
+        parser.add_argument('--poll-interval', type=float, default=0.5, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1.')
+        if options['workers'] > 1 and multiprocessing.get_start_method() != 'fork':
+            raise CommandError('Several workers need the fork start method.')
+
+        started = time.perf_counter()
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_worker, args=(options['batch_size'], options['poll_interval'], options['once'], results),
+            )
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        # Ctrl+C reaches the workers too; wait for them to wind down.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self.stdout.write(f'Processing the order queue with {len(workers)} worker(s); Ctrl+C to stop.')
+        # The outcomes are a few bytes each, so joining first cannot block on the queue.
+        for worker in workers:
+            worker.join()
+        if any(worker.exitcode for worker in workers):
+            raise CommandError('A queue worker crashed; see the traceback above.')
+        outcomes = [results.get() for _ in workers]
+
+        done = sum(outcome[0] for outcome in outcomes)
+        failed = sum(outcome[1] for outcome in outcomes)
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {done} orders from the queue ({failed} tickets failed) in {seconds:.1f}s.'
+        ))
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from LittleLemonDRF.models import DailySales, MenuItemDailySales, Order, OrderItem
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENT)
+
+
+def expected_summaries():
+    """Aggregate the sales summaries straight from Order and OrderItem."""
+    days = {
+        row['date']: (row['order_count'], _money(row['revenue']))
+        for row in Order.objects.values('date').annotate(order_count=Count('id'), revenue=Sum('total')).order_by()
+    }
+    items = {
+        (row['order__date'], row['menuitem']): (row['quantity'], _money(row['revenue']))
+        for row in OrderItem.objects.values('order__date', 'menuitem')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('price')).order_by()
+    }
+    return days, items
+
+
+def stored_summaries():
+    # Rows whose counters dropped back to zero after deletions are equivalent
+    # to missing rows, so they are left out of the comparison.
+    days = {
+        date: (order_count, _money(revenue))
+        for date, order_count, revenue in DailySales.objects.exclude(order_count=0)
+        .values_list('date', 'order_count', 'revenue')
+    }
+    items = {
+        (date, menuitem): (quantity, _money(revenue))
+        for date, menuitem, quantity, revenue in MenuItemDailySales.objects.exclude(quantity=0)
+        .values_list('date', 'menuitem', 'quantity', 'revenue')
+    }
+    return days, items
+
+
+def diff(expected, stored):
+    return sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailySales and MenuItemDailySales summaries from orders and verify them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the summaries with the orders; exit with an error on drift.',
+        )
+
+    def handle(self, *args, **options):
+        expected_days, expected_items = expected_summaries()
+        stored_days, stored_items = stored_summaries()
+        day_drift = diff(expected_days, stored_days)
+        item_drift = diff(expected_items, stored_items)
+        self.stdout.write(
+            f'{len(day_drift)} day row(s) and {len(item_drift)} menu item row(s) differ from the orders.'
+        )
+
+        if options['check']:
+            if day_drift or item_drift:
+                raise CommandError('Sales summaries do not match the orders.')
+            return
+
+        with transaction.atomic():
+            DailySales.objects.all().delete()
+            MenuItemDailySales.objects.all().delete()
+            DailySales.objects.bulk_create(
+                (DailySales(date=date, order_count=order_count, revenue=revenue)
+                 for date, (order_count, revenue) in expected_days.items()),
+                batch_size=1000,
+            )
+            MenuItemDailySales.objects.bulk_create(
+                (MenuItemDailySales(date=date, menuitem_id=menuitem, quantity=quantity, revenue=revenue)
+                 for (date, menuitem), (quantity, revenue) in expected_items.items()),
+                batch_size=1000,
+            )
+
+            expected_days, expected_items = expected_summaries()
+            stored_days, stored_items = stored_summaries()
+            if diff(expected_days, stored_days) or diff(expected_items, stored_items):
+                raise CommandError('Rebuilt sales summaries do not match the orders.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(expected_days)} day row(s) and {len(expected_items)} menu item row(s).'
+        ))
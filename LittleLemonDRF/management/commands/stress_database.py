@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from LittleLemonDRF.fastpath import ValuesSerializer
+from LittleLemonDRF.ingestion import enqueue_order, process_tickets
+from LittleLemonDRF.models import Cart, MenuItem, Order
+from LittleLemonDRF.orders import CheckoutConflict, place_order
+from LittleLemonDRF.serializers import OrderSerializer
+
+
+def _worker(role, user_id, menu, database, options, start, duration, results, ingestion='sync'):
+    # Runs in a forked child: point the inherited (closed) connection at the
+    # scratch copy with the configuration under test before the first query.
+    connection = connections['default']
+    connection.settings_dict['NAME'] = database
+    connection.settings_dict['OPTIONS'] = options
+    rng = random.Random(user_id)
+    checkout = enqueue_order if ingestion == 'queued' else place_order
+
+    operations = locked = failed = 0
+    latencies = []
+    while time.time() < start:
+        time.sleep(0.001)
+    if role == 'drain':
+        _drain(start + duration, results)
+        return
+    user = User.objects.get(pk=user_id)
+    # Readers load a page of orders the way OrderView.get does.
+    values = ValuesSerializer.for_serializer(OrderSerializer())
+    while time.time() < start + duration:
+        began = time.perf_counter()
+        try:
+            if role == 'write':
+                menuitem_id, price = rng.choice(menu)
+                Cart.objects.update_or_create(
+                    user=user, menuitem_id=menuitem_id,
+                    defaults={'quantity': 1, 'unit_price': price, 'price': price},
+                )
+                checkout(user)
+            else:
+                values.serialize(values.values(Order.objects.filter(user=user).order_by('-date'))[:10])
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+            continue
+        except CheckoutConflict:
+            failed += 1
+            continue
+        operations += 1
+        latencies.append(time.perf_counter() - began)
+
+    connection.close()
+    results.put((role, operations, locked, failed, latencies, duration))
+
+
+def _drain(deadline, results):
+    # A queue worker: keeps going after the burst until the backlog is gone.
+    # Its latencies are those of the tickets, from checkout to order.
+    began = time.time()
+    operations = locked = 0
+    latencies = []
+    while True:
+        try:
+            tickets = process_tickets()
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+            continue
+        if not tickets:
+            if time.time() >= deadline:
+                break
+            time.sleep(0.05)
+            continue
+        operations += len(tickets)
+        latencies.extend((ticket.processed - ticket.created).total_seconds() for ticket in tickets)
+    connections['default'].close()
+    results.put(('drain', operations, locked, 0, latencies, time.time() - began))
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent checkout writers and order readers in separate processes against a scratch copy of '
+        'the SQLite database, with the configured connection options and, for comparison, with SQLite defaults. '
+        'With --ingestion queued, checkouts go through the order queue and --queue-workers drain it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run.')
+        parser.add_argument(
+            '--configuration', choices=['both', 'defaults', 'configured'], default='both',
+            help='Which connection options to run with.',
+        )
+        parser.add_argument(
+            '--ingestion', choices=['both', 'sync', 'queued'], default='sync',
+            help='Whether checkouts create orders in the request, go through the order queue, or both in turn.',
+        )
+        parser.add_argument('--queue-workers', type=int, default=2, help='Queue workers in queued runs.')
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('The stress test only applies to SQLite.')
+        if multiprocessing.get_start_method() != 'fork':
+            raise CommandError('The stress test needs the fork start method.')
+
+        customers = list(
+            User.objects.filter(groups__isnull=True, is_active=True).order_by('pk')
+            .values_list('pk', flat=True)[:options['writers'] + options['readers']]
+        )
+        menu = list(MenuItem.objects.order_by('pk').values_list('pk', 'price')[:1000])
+        if len(customers) < options['writers'] + options['readers'] or not menu:
+            raise CommandError('Not enough customers or menu items; run generate_dataset first.')
+
+        runs = {
+            'defaults': {},
+            'configured': settings.DATABASES['default'].get('OPTIONS', {}),
+        }
+        if options['configuration'] != 'both':
+            runs = {options['configuration']: runs[options['configuration']]}
+        modes = ['sync', 'queued'] if options['ingestion'] == 'both' else [options['ingestion']]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name, connection_options in runs.items():
+                for mode in modes:
+                    database = os.path.join(directory, f'{name}-{mode}.sqlite3')
+                    self.copy_database(source, database)
+                    outcomes = self.run(database, connection_options, customers, menu, options, mode)
+                    self.report(f'{name}, {mode} checkout', outcomes)
+
+    def copy_database(self, source, database):
+        source.close()
+        with sqlite3.connect(str(source.settings_dict['NAME'])) as origin, sqlite3.connect(database) as copy:
+            origin.backup(copy)
+        # The WAL flag is stored in the file, so start every run from the
+        # default rollback journal and let the options under test decide.
+        with sqlite3.connect(database) as copy:
+            copy.execute('PRAGMA journal_mode=DELETE')
+
+    def run(self, database, connection_options, customers, menu, options, ingestion):
+        # Children must not share the parent's SQLite handle.
+        connections.close_all()
+        results = multiprocessing.Queue()
+        start = time.time() + 1
+        roles = list(zip(['write'] * options['writers'] + ['read'] * options['readers'], customers))
+        if ingestion == 'queued':
+            roles += [('drain', None)] * options['queue_workers']
+        workers = [
+            multiprocessing.Process(
+                target=_worker,
+                args=(role, user_id, menu, database, connection_options, start, options['duration'], results, ingestion),
+            )
+            for role, user_id in roles
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        if any(worker.exitcode for worker in workers):
+            raise CommandError('A stress worker crashed; see the traceback above.')
+        return outcomes
+
+    def report(self, name, outcomes):
+        # For the queue workers ("drain"), ops are orders created and the
+        # latencies run from checkout to order, until the backlog was cleared.
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+        for role in ('write', 'read', 'drain'):
+            rows = [outcome for outcome in outcomes if outcome[0] == role]
+            if not rows:
+                continue
+            operations = sum(row[1] for row in rows)
+            locked = sum(row[2] for row in rows)
+            conflicts = sum(row[3] for row in rows)
+            latencies = sorted(latency for row in rows for latency in row[4])
+            seconds = max(row[5] for row in rows)
+            p95, p99 = (latencies[int(len(latencies) * q)] * 1000 if latencies else 0.0 for q in (0.95, 0.99))
+            line = (
+                f'  {role:<5} {operations / seconds:>9.1f} ops/s  p95 {p95:>8.2f}ms  p99 {p99:>8.2f}ms  '
+                f'{locked} "database is locked" errors'
+            )
+            if conflicts:
+                line += f', {conflicts} checkout conflicts'
+            self.stdout.write(self.style.ERROR(line) if locked else line)
@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from LittleLemonDRF.db_routers import replica_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over each replica file. Stands in for replication when the '
+        'replicas are local SQLite files, e.g. in development.'
+    )
+
+    def handle(self, *args, **options):
+        replicas = replica_databases()
+        if not replicas:
+            raise CommandError('No replicas configured; set the DATABASE_REPLICAS environment variable.')
+
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas can be synced this way; use the database replication instead.')
+
+        for alias in replicas:
+            replica = connections[alias]
+            replica.close()
+            with sqlite3.connect(str(primary.settings_dict['NAME'])) as source, \
+                    sqlite3.connect(str(replica.settings_dict['NAME'])) as target:
+                source.backup(target)
+            self.stdout.write(self.style.SUCCESS(f'Copied the primary database to {alias}.'))
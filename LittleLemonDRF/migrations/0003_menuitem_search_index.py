@@ -0,0 +1,86 @@
+# Generated by Django 6.0.1 on 2026-10-18 05:41
+
+import LittleLemonDRF.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE "LittleLemonDRF_menuitemsearchindex" USING fts5(
+        title, category_title, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+    )
+    """,
+    """
+    INSERT INTO "LittleLemonDRF_menuitemsearchindex" (rowid, title, category_title)
+    SELECT m.id, m.title, c.title
+    FROM "LittleLemonDRF_menuitem" m JOIN "LittleLemonDRF_category" c ON c.id = m.category_id
+    """,
+    """
+    CREATE TRIGGER "LittleLemonDRF_menuitem_search_insert" AFTER INSERT ON "LittleLemonDRF_menuitem" BEGIN
+        INSERT INTO "LittleLemonDRF_menuitemsearchindex" (rowid, title, category_title)
+        SELECT new.id, new.title, c.title FROM "LittleLemonDRF_category" c WHERE c.id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER "LittleLemonDRF_menuitem_search_update" AFTER UPDATE OF title, category_id ON "LittleLemonDRF_menuitem" BEGIN
+        DELETE FROM "LittleLemonDRF_menuitemsearchindex" WHERE rowid = old.id;
+        INSERT INTO "LittleLemonDRF_menuitemsearchindex" (rowid, title, category_title)
+        SELECT new.id, new.title, c.title FROM "LittleLemonDRF_category" c WHERE c.id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER "LittleLemonDRF_menuitem_search_delete" AFTER DELETE ON "LittleLemonDRF_menuitem" BEGIN
+        DELETE FROM "LittleLemonDRF_menuitemsearchindex" WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER "LittleLemonDRF_category_search_update" AFTER UPDATE OF title ON "LittleLemonDRF_category" BEGIN
+        UPDATE "LittleLemonDRF_menuitemsearchindex" SET category_title = new.title
+        WHERE rowid IN (SELECT id FROM "LittleLemonDRF_menuitem" WHERE category_id = new.id);
+    END
+    """,
+]
+
+REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS "LittleLemonDRF_category_search_update"',
+    'DROP TRIGGER IF EXISTS "LittleLemonDRF_menuitem_search_delete"',
+    'DROP TRIGGER IF EXISTS "LittleLemonDRF_menuitem_search_update"',
+    'DROP TRIGGER IF EXISTS "LittleLemonDRF_menuitem_search_insert"',
+    'DROP TABLE IF EXISTS "LittleLemonDRF_menuitemsearchindex"',
+]
+
+
+def _run_on_sqlite(statements):
+    # The FTS5 index is SQLite-only; other databases keep using icontains.
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonDRF', '0002_sales_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemSearchIndex',
+            fields=[
+                ('menuitem', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='LittleLemonDRF.menuitem')),
+                ('title', models.TextField()),
+                ('category_title', models.TextField()),
+                ('document', LittleLemonDRF.search.FullTextField(db_column='LittleLemonDRF_menuitemsearchindex')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'LittleLemonDRF_menuitemsearchindex',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(_run_on_sqlite(FORWARD_SQL), _run_on_sqlite(REVERSE_SQL)),
+    ]
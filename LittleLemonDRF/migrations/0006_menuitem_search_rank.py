@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:02
+
+from django.db import migrations
+
+# The rank column of the FTS5 index scores with bm25(); weighting the dish
+# title ten times the category title puts dishes named after the search
+# terms ahead of dishes that are merely in a matching category.
+SET_RANK_SQL = """
+    INSERT INTO "LittleLemonDRF_menuitemsearchindex" ("LittleLemonDRF_menuitemsearchindex", rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+"""
+
+RESET_RANK_SQL = """
+    INSERT INTO "LittleLemonDRF_menuitemsearchindex" ("LittleLemonDRF_menuitemsearchindex", rank)
+    VALUES ('rank', 'bm25()')
+"""
+
+
+def _run_on_sqlite(statement):
+    # The FTS5 index only exists on SQLite (see 0003).
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonDRF', '0005_checkout_ticket'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_sqlite(SET_RANK_SQL), _run_on_sqlite(RESET_RANK_SQL)),
+    ]
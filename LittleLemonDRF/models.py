@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .search import FullTextField
+
 # Create your models here.
 class Category(models.Model):
     slug = models.SlugField()
@@ -15,6 +17,26 @@ class MenuItem(models.Model):
     featured = models.BooleanField(db_index=True)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)
     
+    
+class MenuItemSearchIndex(models.Model):
+    """SQLite FTS5 table over menu item and category titles.
+
+    Created by a migration and kept in sync by database triggers, so bulk
+    writes and admin edits are indexed too. Only used for lookups.
+    """
+    menuitem = models.OneToOneField(
+        MenuItem, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_index',
+    )
+    title = models.TextField()
+    category_title = models.TextField()
+    document = FullTextField(db_column='LittleLemonDRF_menuitemsearchindex')
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'LittleLemonDRF_menuitemsearchindex'
+    
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
@@ -32,6 +54,17 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=6, decimal_places=2)
     date = models.DateField(db_index=True)
     
+    class Meta:
+        # One index per access path of OrderView.get; the primary key is the
+        # implicit last column, which also serves the keyset tiebreaker.
+        indexes = [
+            models.Index(fields=['user', 'date'], name='order_user_date_idx'),
+            models.Index(fields=['delivery_crew', 'status', 'date'], name='order_crew_status_date_idx'),
+            models.Index(fields=['date', 'status', 'total'], name='order_date_status_total_idx'),
+            models.Index(fields=['status', 'total'], name='order_status_total_idx'),
+            models.Index(fields=['total'], name='order_total_idx'),
+        ]
+    
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
@@ -40,4 +73,49 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2)
     
     class Meta:
-        unique_together = ('order', 'menuitem')
\ No newline at end of file
+        unique_together = ('order', 'menuitem')
+
+
+class DailySales(models.Model):
+    """Per-day revenue summary, maintained incrementally as orders come and go."""
+    date = models.DateField(unique=True)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class MenuItemDailySales(models.Model):
+    """Per-day, per-dish sales summary backing the top-sellers report."""
+    date = models.DateField(db_index=True)
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ('date', 'menuitem')
+
+
+class CheckoutTicket(models.Model):
+    """A checkout waiting in the order queue (ORDER_INGESTION_MODE = 'queued').
+
+    ``lines`` is the cart as it was at checkout, ``[menuitem id, quantity,
+    unit price, price]`` per line; process_order_queue turns it into an order.
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    lines = models.JSONField()
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=PENDING)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    processed = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        # The workers only ever look for pending tickets, oldest first.
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='ticket_pending_idx'),
+        ]
@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .analytics import record_order
+from .events import order_event, publish
+from .models import Cart, Order, OrderItem
+
+
+class CheckoutConflict(Exception):
+    """The cart changed underneath a checkout, e.g. a parallel checkout won."""
+
+
+def place_order(user):
+    """Turn the user's cart into an order atomically.
+
+    The cart rows are locked, the order and all of its items are inserted in
+    two statements and the cart is cleared, so concurrent checkouts of the same
+    cart can never produce two orders. Returns None when the cart is empty.
+    """
+    with transaction.atomic():
+        lines = list(
+            Cart.objects.select_for_update()
+            .filter(user=user)
+            .values_list('pk', 'menuitem_id', 'quantity', 'unit_price', 'price')
+        )
+        if not lines:
+            return None
+
+        cart_ids = [line[0] for line in lines]
+        total = Cart.objects.filter(pk__in=cart_ids).aggregate(total=Sum('price'))['total']
+
+        order = Order.objects.create(user=user, total=total, date=date.today(), status=False)
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, menuitem_id=menuitem_id, quantity=quantity, unit_price=unit_price, price=price)
+            for _, menuitem_id, quantity, unit_price, price in lines
+        )
+
+        # Databases without row locks (SQLite) rely on this check instead: a
+        # checkout that did not delete every line it read lost the race.
+        deleted, _ = Cart.objects.filter(pk__in=cart_ids).delete()
+        if deleted != len(lines):
+            raise CheckoutConflict
+
+        record_order(order, [(menuitem_id, quantity, price) for _, menuitem_id, quantity, _, price in lines])
+        publish(order_event('order.created', order.pk, user.pk, None, False))
+    return order
+
+
+def delete_order(order):
+    """Delete an order; the pre_delete receiver takes it back out of the sales summaries."""
+    with transaction.atomic():
+        publish(order_event('order.deleted', order.pk, order.user_id, order.delivery_crew_id, order.status))
+        order.delete()
+
+
+def update_order_status(order_ids, status, delivery_crew=None):
+    """Set ``status`` on many orders with one UPDATE of that column only.
+
+    With ``delivery_crew`` only orders assigned to that user are changed.
+    Returns ``{order id: error message or None}``, None meaning updated.
+    """
+    with transaction.atomic():
+        orders = {
+            order_id: (user_id, crew_id)
+            for order_id, user_id, crew_id in Order.objects.filter(pk__in=order_ids).values_list('pk', 'user_id', 'delivery_crew_id')
+        }
+        results = {}
+        for order_id in order_ids:
+            if order_id not in orders:
+                results[order_id] = 'Order not found.'
+            elif delivery_crew is not None and orders[order_id][1] != delivery_crew.pk:
+                results[order_id] = 'You are not assigned to this order.'
+            else:
+                results[order_id] = None
+
+        allowed = [order_id for order_id, error in results.items() if error is None]
+        if allowed:
+            queryset = Order.objects.filter(pk__in=allowed)
+            if delivery_crew is not None:
+                queryset = queryset.filter(delivery_crew=delivery_crew)
+            queryset.update(status=status)
+            publish(*(order_event('order.updated', order_id, *orders[order_id], status) for order_id in allowed))
+    return results
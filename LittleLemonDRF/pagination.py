@@ -0,0 +1,215 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views: the count and the page are awaited."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the queryset's own ordering.
+
+    The ordering the view applied (e.g. ``-date`` or ``price``) is extended
+    with the primary key as a unique tiebreaker, and the cursor stores the
+    last row's values for those columns. Each page is a single
+    ``WHERE (a, pk) > (x, y) ORDER BY a, pk LIMIT n`` query, so deep pages
+    cost the same as the first one and no ``COUNT(*)`` is issued.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params or
+            request.query_params.get(cls.mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        self.cursor = cursor
+        self.reverse = bool(cursor and cursor['reverse'])
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(cursor['position'], self.reverse))
+        ordering = [self._invert(field) for field in self.ordering] if self.reverse else self.ordering
+
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str) and field != '?']
+        if not ordering and queryset.query.default_ordering:
+            ordering = [field for field in queryset.query.get_meta().ordering if isinstance(field, str)]
+        pk_names = {'pk', self.model._meta.pk.name}
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def get_keyset_filter(self, position, reverse):
+        # (a, b, pk) > (x, y, z) expanded into
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND pk > z),
+        # with the comparison flipped for descending columns.
+        keyset = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            equal = {self.ordering[i].lstrip('-'): position[i] for i in range(index)}
+            keyset |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': position[index]})
+
+        # The redundant a >= x bound lets the database seek the index on the
+        # leading column instead of walking it from the start past every OR.
+        name = self.ordering[0].lstrip('-')
+        descending = self.ordering[0].startswith('-') != reverse
+        return Q(**{f'{name}__{"lte" if descending else "gte"}': position[0]}) & keyset
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        position = [self._value(row, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'p': position, 'r': reverse}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        token = urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            position = payload['p']
+            if len(position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+            # Rows are compared with < and >, which NULL never satisfies.
+            if None in position:
+                raise ValueError
+            return {'position': position, 'reverse': bool(payload.get('r'))}
+        except (ValueError, TypeError, KeyError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _field(self, name):
+        if name in self.annotations:
+            return self.annotations[name].output_field
+        if name == 'pk':
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def _value(self, row, name):
+        if isinstance(row, dict):
+            return row[self.model._meta.pk.attname if name == 'pk' else name]
+        if name == 'pk' or name in self.annotations:
+            return getattr(row, name)
+        return getattr(row, self._field(name).attname)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def get_paginator(request, pagination_class):
+    """Keyset pagination when the client asks for it, the view's default otherwise."""
+    if KeysetPagination.is_requested(request):
+        return KeysetPagination()
+    return pagination_class()
@@ -0,0 +1,243 @@
+import math
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PERFORMANCE_METRICS_ENABLED = getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True)
+
+# Histogram buckets grow by 2**(1/4), so a reported percentile is the upper
+# bound of its bucket and at most ~19% above the true value.
+_BUCKET_GROWTH = 2 ** 0.25
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+_BUCKET_BASE = 0.01
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('db_time', 'queries', 'serializing', 'serialize_time', 'render_start', 'render_time')
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.serializing = False
+        self.serialize_time = 0.0
+        self.render_start = None
+        self.render_time = 0.0
+
+
+class Histogram:
+    """Log-bucketed histogram: constant memory per series, O(1) to record."""
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        index = 0 if value <= _BUCKET_BASE else math.ceil(math.log(value / _BUCKET_BASE) / _LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_BUCKET_BASE * _BUCKET_GROWTH ** index, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'p50': round(self.percentile(0.50), 2),
+            'p95': round(self.percentile(0.95), 2),
+            'p99': round(self.percentile(0.99), 2),
+            'max': round(self.max, 2),
+            'mean': round(self.total / self.count, 2) if self.count else 0.0,
+        }
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'errors', 'wall_ms', 'db_ms', 'serialize_ms', 'render_ms', 'queries')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.wall_ms = Histogram()
+        self.db_ms = Histogram()
+        self.serialize_ms = Histogram()
+        self.render_ms = Histogram()
+        self.queries = Histogram()
+
+
+class PerformanceRegistry:
+    """Per-endpoint aggregates for this process, keyed by (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, method, route, status_code, wall, metrics):
+        with self._lock:
+            stats = self._endpoints.get((method, route))
+            if stats is None:
+                stats = self._endpoints[(method, route)] = EndpointStats()
+            stats.requests += 1
+            if status_code >= 500:
+                stats.errors += 1
+            stats.wall_ms.record(wall * 1000)
+            stats.db_ms.record(metrics.db_time * 1000)
+            stats.serialize_ms.record(metrics.serialize_time * 1000)
+            stats.render_ms.record(metrics.render_time * 1000)
+            stats.queries.record(metrics.queries)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = [
+                {
+                    'method': method,
+                    'route': route,
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'total_ms': round(stats.wall_ms.total, 2),
+                    'wall_ms': stats.wall_ms.summary(),
+                    'db_ms': stats.db_ms.summary(),
+                    'serialize_ms': stats.serialize_ms.summary(),
+                    'render_ms': stats.render_ms.summary(),
+                    'queries': stats.queries.summary(),
+                }
+                for (method, route), stats in self._endpoints.items()
+            ]
+        endpoints.sort(key=lambda endpoint: endpoint['total_ms'], reverse=True)
+        return endpoints
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = PerformanceRegistry()
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper that charges query time to the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+def timed_serialization(function):
+    """Charge calls of ``function`` to the current request's serialization time.
+
+    Only the outermost call is timed, so a serializer nested in another one is
+    counted once. Queries the call triggers, e.g. of lazy related objects,
+    count towards both serialization and database time.
+    """
+    @wraps(function)
+    def timed(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return function(*args, **kwargs)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.serialize_time += time.perf_counter() - start
+            metrics.serializing = False
+    return timed
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if PERFORMANCE_METRICS_ENABLED and time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class PerformanceMiddleware:
+    """Time each request and report it in a Server-Timing header.
+
+    Wall time, database time and query count, serialization time (of the
+    callables wrapped in ``timed_serialization``) and response rendering time
+    are recorded per resolved route into ``registry``. Put it first in
+    MIDDLEWARE so the wall time covers the rest of the stack; set
+    PERFORMANCE_METRICS_ENABLED = False to take it out entirely.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not PERFORMANCE_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, metrics)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook; the post-render
+        # callback closes the interval.
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.render_start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self.rendered(metrics))
+        return response
+
+    @staticmethod
+    def rendered(metrics):
+        metrics.render_time = time.perf_counter() - metrics.render_start
+
+    def finish(self, request, response, wall, metrics):
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={wall * 1000:.2f}',
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_time * 1000:.2f}',
+            f'render;dur={metrics.render_time * 1000:.2f}',
+        ])
+        match = request.resolver_match
+        if match is not None:
+            # Router routes are regexes; drop their end anchor for readability.
+            registry.record(request.method, match.route.rstrip('$'), response.status_code, wall, metrics)
+        return response
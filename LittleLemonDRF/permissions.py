@@ -1,22 +1,41 @@
 from rest_framework.permissions import BasePermission
 
-class IsManager(BasePermission):
+from .roles import DELIVERY_CREW, MANAGER, aget_roles, get_roles
+
+
+class RolePermission(BasePermission):
+    """Base for permissions decided by the requesting user's roles.
+
+    Subclasses implement ``has_roles``; the roles are resolved once per
+    request, synchronously or from async views via ``ahas_permission``.
+    """
+    def has_roles(self, request, roles):
+        raise NotImplementedError
+
     def has_permission(self, request, view):
+        return self.has_roles(request, get_roles(request))
+
+    async def ahas_permission(self, request, view):
+        return self.has_roles(request, await aget_roles(request))
+
+
+class IsManager(RolePermission):
+    def has_roles(self, request, roles):
         return (
             request.user.is_authenticated and
-            request.user.groups.filter(name='Manager').exists()
+            MANAGER in roles
         )
 
 
-class IsDeliveryCrew(BasePermission):
-    def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='Delivery Crew').exists()
+class IsDeliveryCrew(RolePermission):
+    def has_roles(self, request, roles):
+        return bool(request.user) and DELIVERY_CREW in roles
 
 
-class IsCustomer(BasePermission):
+class IsCustomer(RolePermission):
     """Permission for customers (authenticated users without Manager or Delivery Crew role)"""
-    def has_permission(self, request, view):
+    def has_roles(self, request, roles):
         return (
             request.user.is_authenticated and
-            not request.user.groups.filter(name__in=['Manager', 'Delivery Crew']).exists()
-        )
\ No newline at end of file
+            not roles & {MANAGER, DELIVERY_CREW}
+        )
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import is_shared_cache
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery Crew'
+
+# invalidate_roles() only reaches other processes through a shared cache;
+# with a process-local one, cached roles are kept briefly to bound how long
+# a removed role keeps granting access in the other workers.
+ROLE_CACHE_TIMEOUT = getattr(settings, 'ROLE_CACHE_TIMEOUT', 300 if is_shared_cache() else 5)
+
+
+def _cache_key(user_id):
+    return f'roles:{user_id}'
+
+
+def get_user_roles(user):
+    """Return the set of group names of a user, served from the role cache."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    key = _cache_key(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, roles, ROLE_CACHE_TIMEOUT)
+    return roles
+
+
+async def aget_user_roles(user):
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    key = _cache_key(user.pk)
+    roles = await cache.aget(key)
+    if roles is None:
+        roles = frozenset([name async for name in user.groups.values_list('name', flat=True)])
+        await cache.aset(key, roles, ROLE_CACHE_TIMEOUT)
+    return roles
+
+
+def get_roles(request):
+    """Return the roles of the requesting user, resolved at most once per request."""
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        roles = get_user_roles(request.user)
+        request._roles = roles
+    return roles
+
+
+async def aget_roles(request):
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        roles = await aget_user_roles(request.user)
+        request._roles = roles
+    return roles
+
+
+def invalidate_roles(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
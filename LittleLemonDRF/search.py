@@ -0,0 +1,44 @@
+from django.db import connections, models
+from django.db.models import F, Lookup
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+
+class FullTextField(models.TextField):
+    """The hidden FTS5 column named after its table, which accepts MATCH queries."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+def fts_query(terms):
+    """Quote each search term and make it a prefix query; terms are ANDed."""
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+class MenuItemSearchFilter(SearchFilter):
+    """``?search=`` served by the FTS5 menu index instead of ``icontains`` scans.
+
+    Every term is prefix-matched against the dish and category titles and
+    results come back best match first (bm25, dish titles weighted above
+    category titles), unless the client asked for an explicit ``?ordering=``. Databases other than SQLite fall back to the
+    regular ``search_fields`` lookups.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or connections[queryset.db].vendor != 'sqlite':
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = queryset.filter(search_index__document__match=fts_query(terms))
+        queryset = queryset.annotate(search_rank=F('search_index__rank'))
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('search_rank', 'pk')
+        return queryset
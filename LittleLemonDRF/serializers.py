@@ -1,31 +1,262 @@
 # restaurant/serializers.py
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Cart, MenuItem, Order, OrderItem
+from .models import Cart, Category, CheckoutTicket, DailySales, MenuItem, Order, OrderItem
+from .performance import timed_serialization
 
-class MenuItemSerializer(serializers.ModelSerializer):
+
+def parse_field_paths(value):
+    """Turn ``"id,order_items.menuitem"`` into ``{'id': {}, 'order_items': {'menuitem': {}}}``."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (name.strip() for name in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class TimedSerializerMixin:
+    """Report the time spent rendering instances as the request's ``serialize`` Server-Timing."""
+
+    @timed_serialization
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+
+class SparseFieldsMixin:
+    """Let ``?fields=`` pick the fields of an output serializer and ``?expand=`` nest objects.
+
+    Both take comma-separated, dotted paths (``?fields=id,order_items.quantity``,
+    ``?expand=order_items.menuitem``). Unrequested fields are dropped before
+    serialization, and ``Meta.expandable_fields`` maps the relations that are
+    rendered as a primary key unless expanded to the serializer used when they
+    are. Serializers given input ``data`` are left whole. Unknown names are a
+    validation error, which the view answers with a 400.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None and 'data' not in kwargs:
+            self.sparse(
+                parse_field_paths(request.query_params.get('fields', '')),
+                parse_field_paths(request.query_params.get('expand', '')),
+            )
+
+    def sparse(self, fields, expand, prefix=''):
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for param, names, known in [('fields', fields, self.fields), ('expand', expand, {**self.fields, **expandable})]:
+            unknown = [f'{prefix}{name}' for name in names if name not in known]
+            if unknown:
+                raise serializers.ValidationError({param: [f'Unknown field: {name}.' for name in unknown]})
+
+        for name, serializer_class in expandable.items():
+            if name in expand and name in self.fields:
+                self.fields[name] = serializer_class(read_only=True)
+        if fields:
+            for name in [name for name in self.fields if name not in fields]:
+                del self.fields[name]
+
+        for name, field in self.fields.items():
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, SparseFieldsMixin):
+                nested.sparse(fields.get(name, {}), expand.get(name, {}), f'{prefix}{name}.')
+
+
+def related_items(relation):
+    """Rows of a reverse relation in a stable order: the model's own ordering or the primary key."""
+    items = relation.related_model._default_manager.all()
+    return items if items.ordered else items.order_by('pk')
+
+
+def _plan_columns(serializer, model, prefix, only, related, prefetches):
+    for field in serializer.fields.values():
+        if field.source == '*' or '.' in field.source:
+            return False
+        path = prefix + field.source
+
+        if isinstance(field, serializers.ListSerializer):
+            relation = next(
+                (rel for rel in model._meta.related_objects if rel.get_accessor_name() == field.source), None
+            )
+            if relation is None:
+                return False
+            prefetches.append(Prefetch(path, queryset=_restrict(related_items(relation), field.child, [relation.field.name])))
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return False
+        only.append(path)
+        if isinstance(field, serializers.BaseSerializer):
+            related.append(path)
+            if not _plan_columns(field, model_field.related_model, f'{path}__', only, related, prefetches):
+                return False
+    return True
+
+
+def _restrict(queryset, serializer, keep):
+    only, related, prefetches = list(keep), [], []
+    if not _plan_columns(serializer, queryset.model, '', only, related, prefetches):
+        return queryset
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset.only(*only)
+
+
+def sparse_queryset(queryset, serializer):
+    """Load only the columns and relations ``serializer`` is going to render.
+
+    Model fields become ``only()``, expanded relations ``select_related()`` and
+    nested lists a ``Prefetch`` restricted the same way. Ordering columns are
+    kept so cursors can be built without extra queries. Querysets for
+    serializers with fields that cannot be mapped are returned unchanged.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    columns = {field.name for field in queryset.model._meta.concrete_fields}
+    keep = [
+        name for name in (ordering.lstrip('-') for ordering in queryset.query.order_by if isinstance(ordering, str))
+        if name in columns
+    ]
+    return _restrict(queryset, serializer, keep)
+
+
+class CategorySerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = '__all__'
+        
+        
+class MenuItemSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MenuItem
         fields = '__all__'
+        expandable_fields = {'category': CategorySerializer}
+        
+        
+class CategoryImportSerializer(serializers.Serializer):
+    """One row of a bulk category import; ``id`` selects update over insert."""
+    id = serializers.IntegerField(required=False, min_value=1)
+    slug = serializers.SlugField()
+    title = serializers.CharField(max_length=255)
+    
+    
+class MenuItemImportSerializer(serializers.Serializer):
+    """One row of a bulk menu import, validated without database lookups."""
+    id = serializers.IntegerField(required=False, min_value=1)
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    featured = serializers.BooleanField()
+    category = serializers.IntegerField()
         
         
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     quantity = serializers.IntegerField(min_value=1)
     
     class Meta:
         model = Cart
         fields = '__all__'
         read_only_fields = ('user', 'unit_price', 'price')
+        expandable_fields = {'menuitem': MenuItemSerializer}
         
-class OrderItemSerializer(serializers.ModelSerializer):
-    menuitem = MenuItemSerializer(read_only=True)
+        
+class CartLineSerializer(serializers.Serializer):
+    """Cart input validated without queries; the view resolves ``menuitem`` itself."""
+    menuitem = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
     
+    @staticmethod
+    def menuitem_does_not_exist(pk_value):
+        message = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+        return message.format(pk_value=pk_value)
+        
+class OrderItemSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = '__all__'
+        expandable_fields = {'menuitem': MenuItemSerializer}
         
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     order_items = OrderItemSerializer(many=True, read_only=True, source='orderitem_set')
     
     class Meta:
         model = Order
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        
+        
+class CheckoutTicketSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CheckoutTicket
+        fields = ['id', 'status', 'order', 'total', 'error', 'created', 'processed']
+        
+        
+class DispatchSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(required=False, min_value=1)
+    
+    
+class OrderAssignmentSerializer(serializers.Serializer):
+    order = serializers.IntegerField()
+    delivery_crew = serializers.IntegerField()
+    
+    
+class BulkAssignSerializer(serializers.Serializer):
+    assignments = OrderAssignmentSerializer(many=True, allow_empty=False, max_length=1000)
+    
+    def validate_assignments(self, assignments):
+        orders = [assignment['order'] for assignment in assignments]
+        if len(set(orders)) != len(orders):
+            raise serializers.ValidationError('Each order can only be assigned once.')
+        return assignments
+    
+    
+class BulkStatusSerializer(serializers.Serializer):
+    orders = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.BooleanField()
+    
+    def validate_orders(self, orders):
+        return list(dict.fromkeys(orders))
+    
+    
+class EventPollSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=0)
+    timeout = serializers.FloatField(required=False, min_value=0, max_value=30, default=25)
+    
+    
+class DateRangeSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        if 'start' in data and 'end' in data and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return data
+    
+    
+class TopMenuItemsQuerySerializer(DateRangeSerializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    by = serializers.ChoiceField(choices=['quantity', 'revenue'], default='quantity')
+    
+    
+class DailySalesSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DailySales
+        fields = ('date', 'order_count', 'revenue')
+        
+        
+class SalesSummarySerializer(TimedSerializerMixin, serializers.Serializer):
+    order_count = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    average_ticket = serializers.DecimalField(max_digits=12, decimal_places=2)
+    days = DailySalesSerializer(many=True)
+        
+        
+class MenuItemSalesSerializer(TimedSerializerMixin, serializers.Serializer):
+    menuitem = serializers.IntegerField()
+    title = serializers.CharField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .analytics import remove_order
+from .authentication import invalidate_token, invalidate_user_tokens
+from .caching import bump_catalog_version
+from .models import Category, MenuItem, Order
+from .roles import invalidate_roles
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_roles_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Group.user_set.add(user) arrives with reverse=True and the user ids in
+    # pk_set; user.groups.add(group) arrives with the user as the instance.
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_roles(instance.pk)
+    elif action == 'pre_clear':
+        invalidate_roles(*instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        invalidate_roles(*pk_set)
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=Category)
+def bump_catalog_version_on_change(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(pre_delete, sender=Order)
+def remove_deleted_order_from_sales(sender, instance, **kwargs):
+    # Every delete, including the admin's and the cascade from a deleted
+    # customer, runs in a transaction that this joins; the items are still
+    # there to be subtracted.
+    remove_order(instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key, instance.user_id)
+
+
+@receiver(user_logged_out)
+def invalidate_tokens_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user_tokens(user.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_tokens_of_inactive_user(sender, instance, **kwargs):
+    if not instance.is_active:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_tokens_of_deleted_user(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
@@ -1,3 +1,1329 @@
-from django.test import TestCase
+import asyncio
+import json
+import signal
+import threading
+import time
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from .authentication import token_cache
+from .bulk import MenuItemImporter, iter_request_rows
+from .caching import is_shared_cache
+from .db_routers import REPLICA_STICKY_COOKIE, PrimaryReplicaRouter, _replica_reads
+from .fastpath import ValuesSerializer
+from .ingestion import enqueue_order, process_tickets
+from .management.commands.process_order_queue import drain
+from .models import Cart, Category, CheckoutTicket, DailySales, MenuItem, Order, OrderItem
+from .orders import CheckoutConflict, place_order
+from .performance import RequestMetrics, _current, registry, timed_serialization
+from .roles import DELIVERY_CREW, MANAGER, ROLE_CACHE_TIMEOUT, get_user_roles
+from .serializers import CartSerializer, MenuItemSerializer, OrderSerializer
+
+
+class LittleLemonTestCase(TestCase):
+    """A manager, a delivery crew member, a customer and a small menu.
+
+    Throttling is switched off: the token buckets live in a file shared with
+    the development server, outside the test database.
+    """
+
+    def setUp(self):
+        cache.clear()
+        throttles = mock.patch.object(APIView, 'throttle_classes', [])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+
+        self.manager = User.objects.create_user('manager')
+        self.manager.groups.add(Group.objects.create(name=MANAGER))
+        self.crew = User.objects.create_user('crew')
+        self.crew.groups.add(Group.objects.create(name=DELIVERY_CREW))
+        self.customer = User.objects.create_user('customer')
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.menu_items = [
+            MenuItem.objects.create(title=f'Dish {index}', price=index + 1, featured=index % 2 == 0, category=category)
+            for index in range(5)
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def create_orders(self, count, user=None, items=3):
+        orders = []
+        for index in range(count):
+            order = Order.objects.create(user=user or self.customer, total=items, date=date(2026, 1, 1 + index % 28))
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, menuitem=menu_item, quantity=1, unit_price=1, price=1)
+                for menu_item in self.menu_items[:items]
+            )
+            orders.append(order)
+        return orders
+
+
+class RoleCacheTests(LittleLemonTestCase):
+    def assertNoRoleQueries(self, queries):
+        role_queries = [query['sql'] for query in queries.captured_queries if 'auth_user_groups' in query['sql']]
+        self.assertEqual(role_queries, [])
+
+    def test_order_list_runs_no_role_queries_once_cached(self):
+        Order.objects.filter(pk__in=[order.pk for order in self.create_orders(2)]).update(delivery_crew=self.crew)
+        for user in (self.customer, self.crew, self.manager):
+            client = self.client_for(user)
+            self.assertEqual(client.get('/api/orders').status_code, 200)
+            # The page count, the orders and their items.
+            with self.assertNumQueries(3) as queries:
+                self.assertEqual(client.get('/api/orders').status_code, 200)
+            self.assertNoRoleQueries(queries)
+
+    def test_order_patch_runs_no_role_queries_once_cached(self):
+        order = self.create_orders(1)[0]
+        manager = self.client_for(self.manager)
+        manager.patch(f'/api/orders/{order.pk}', {'delivery_crew_id': self.crew.pk}, format='json')
+        # The order and its items, the assignee and the UPDATE.
+        with self.assertNumQueries(4) as queries:
+            response = manager.patch(f'/api/orders/{order.pk}', {'delivery_crew_id': self.crew.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoRoleQueries(queries)
+
+        crew = self.client_for(self.crew)
+        crew.patch(f'/api/orders/{order.pk}', {'status': True}, format='json')
+        with self.assertNumQueries(3) as queries:
+            response = crew.patch(f'/api/orders/{order.pk}', {'status': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoRoleQueries(queries)
+
+    def test_adding_a_manager_updates_cached_roles(self):
+        customer = self.client_for(self.customer)
+        self.assertEqual(customer.get('/api/groups/manager/users').status_code, 403)
+
+        response = self.client_for(self.manager).post('/api/groups/manager/users', {'user_id': self.customer.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(customer.get('/api/groups/manager/users').status_code, 200)
+
+    def test_removing_a_crew_member_updates_cached_roles(self):
+        crew = self.client_for(self.crew)
+        self.assertEqual(crew.post('/api/orders').status_code, 403)
+
+        response = self.client_for(self.manager).delete(f'/api/groups/delivery-crew/users/{self.crew.pk}')
+        self.assertEqual(response.status_code, 200)
+        # Now a customer, with an empty cart.
+        self.assertEqual(crew.post('/api/orders').status_code, 400)
+
+    def test_roles_cached_per_process_expire_quickly(self):
+        # Other workers never hear of a change to a LocMem cache.
+        self.assertFalse(is_shared_cache())
+        self.assertEqual(ROLE_CACHE_TIMEOUT, 5)
+
+        self.assertEqual(get_user_roles(self.crew), {DELIVERY_CREW})
+        # A change another worker made: its invalidation never reached this cache.
+        with mock.patch('LittleLemonDRF.signals.invalidate_roles'):
+            self.crew.groups.clear()
+        self.assertEqual(get_user_roles(self.crew), {DELIVERY_CREW})
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 6):
+            self.assertEqual(get_user_roles(self.crew), frozenset())
+
+
+class OrderQueryCountTests(LittleLemonTestCase):
+    """Reading orders takes as many queries for one order as for a page of them, whatever their items."""
+
+    def assertConstantQueries(self, client, path, expected, **create):
+        client.get(path)
+        self.create_orders(1, items=1, **create)
+        with self.assertNumQueries(expected):
+            self.assertEqual(client.get(path).status_code, 200)
+        self.create_orders(30, items=5, **create)
+        with self.assertNumQueries(expected):
+            self.assertEqual(client.get(path).status_code, 200)
+
+    def test_order_list(self):
+        # The page count, the orders and their items.
+        self.assertConstantQueries(self.client_for(self.manager), '/api/orders', 3)
+
+    def test_order_list_with_expanded_menu_items(self):
+        # The menu items are joined to the items.
+        self.assertConstantQueries(self.client_for(self.manager), '/api/orders?expand=order_items.menuitem', 3)
+
+    def test_order_list_cursor_page(self):
+        # No page count with keyset pagination.
+        self.assertConstantQueries(self.client_for(self.manager), '/api/orders?pagination=cursor', 2)
+
+    def test_order_detail(self):
+        client = self.client_for(self.customer)
+        order = self.create_orders(1, items=1)[0]
+        path = f'/api/orders/{order.pk}'
+        client.get(path)
+        # The order and its items.
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get(path).status_code, 200)
+
+        order = self.create_orders(30, items=5)[-1]
+        path = f'/api/orders/{order.pk}'
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get(path).status_code, 200)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    def test_parallel_checkouts_of_one_cart_place_one_order(self):
+        customer = User.objects.create_user('customer')
+        category = Category.objects.create(slug='mains', title='Mains')
+        for index in range(3):
+            menu_item = MenuItem.objects.create(title=f'Dish {index}', price=2, featured=False, category=category)
+            Cart.objects.create(user=customer, menuitem=menu_item, quantity=1, unit_price=2, price=2)
+
+        checkouts = 8
+        barrier = threading.Barrier(checkouts)
+        outcomes = []
+
+        def checkout():
+            barrier.wait()
+            try:
+                outcomes.append(place_order(customer))
+            except CheckoutConflict as exc:
+                outcomes.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(checkouts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The losers either find the cart already empty (SQLite's IMMEDIATE
+        # transactions queue them behind the winner) or lose the race on
+        # the cart rows and get CheckoutConflict; neither places an order.
+        orders = [outcome for outcome in outcomes if isinstance(outcome, Order)]
+        self.assertEqual(len(outcomes), checkouts)
+        self.assertEqual(len(orders), 1)
+        for outcome in outcomes:
+            if outcome is not orders[0]:
+                self.assertTrue(outcome is None or isinstance(outcome, CheckoutConflict), outcome)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderItem.objects.filter(order=orders[0]).count(), 3)
+        self.assertFalse(Cart.objects.filter(user=customer).exists())
+
+
+class SalesSummaryTests(LittleLemonTestCase):
+    def place_order(self, user, menu_items):
+        for menu_item in menu_items:
+            Cart.objects.create(user=user, menuitem=menu_item, quantity=2, unit_price=menu_item.price, price=menu_item.price * 2)
+        return place_order(user)
+
+    def assertSummariesMatchOrders(self):
+        call_command('rebuild_sales_summaries', check=True, stdout=StringIO())
+
+    def test_orders_are_recorded(self):
+        self.place_order(self.customer, self.menu_items[:3])
+        self.place_order(self.customer, self.menu_items[1:])
+        self.assertSummariesMatchOrders()
+        self.assertEqual(DailySales.objects.get().order_count, 2)
+
+    def test_deleted_orders_are_removed(self):
+        other = User.objects.create_user('other')
+        deleted_by_api = self.place_order(self.customer, self.menu_items[:2])
+        deleted_directly = self.place_order(self.customer, self.menu_items[2:])
+        self.place_order(other, self.menu_items)
+        self.place_order(other, self.menu_items[:1])
+
+        response = self.client_for(self.manager).delete(f'/api/orders/{deleted_by_api.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertSummariesMatchOrders()
+        # As the admin does.
+        deleted_directly.delete()
+        self.assertSummariesMatchOrders()
+        # Cascades to the customer's orders.
+        other.delete()
+        self.assertSummariesMatchOrders()
+        self.assertEqual(DailySales.objects.get().order_count, 0)
+
+
+class OrderQueryPlanTests(LittleLemonTestCase):
+    """Every order list query is served by the indexes of migration 0004.
+
+    No query may read a whole table, and a filtered query must search an
+    index: ``SCAN ... USING INDEX`` with a WHERE clause reads every entry
+    of that index. Only unfiltered manager pages walk an index in order,
+    stopping after one page.
+    """
+    FILTERS = ['', 'status=true', 'status=false', 'date=2026-01-03', 'status=false&date=2026-01-03']
+    ORDERINGS = ['', 'date', '-date', 'total', '-total', 'status', '-status']
+
+    def setUp(self):
+        super().setUp()
+        orders = self.create_orders(40, items=2)
+        Order.objects.filter(pk__in=[order.pk for order in orders[::2]]).update(delivery_crew=self.crew, status=True)
+
+    def assertNoFullScans(self, client, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                for step in (row[3] for row in cursor.fetchall()):
+                    self.assertNotRegex(step, r'^SCAN (TABLE )?LittleLemonDRF_\w+$', query['sql'])
+                    if ' WHERE ' in query['sql']:
+                        self.assertNotRegex(step, r'^SCAN (TABLE )?LittleLemonDRF_order\b', query['sql'])
+        return response
+
+    def test_order_lists_use_indexes(self):
+        for user in (self.customer, self.crew, self.manager):
+            client = self.client_for(user)
+            for filters in self.FILTERS:
+                for ordering in self.ORDERINGS:
+                    path = '/api/orders?' + '&'.join(filter(None, [filters, ordering and f'ordering={ordering}']))
+                    with self.subTest(user=user.username, path=path):
+                        self.assertNoFullScans(client, path)
+
+    def test_cursor_pages_use_indexes(self):
+        for user in (self.customer, self.crew, self.manager):
+            client = self.client_for(user)
+            for ordering in self.ORDERINGS[1:]:
+                path = f'/api/orders?pagination=cursor&page_size=5&ordering={ordering}'
+                with self.subTest(user=user.username, path=path):
+                    next_page = self.assertNoFullScans(client, path).json()['next']
+                    self.assertIsNotNone(next_page)
+                    self.assertNoFullScans(client, next_page)
+
+
+class AsyncThrottleTests(LittleLemonTestCase):
+    def test_async_views_consume_tokens_off_the_event_loop(self):
+        calls = []
+
+        class Store:
+            def consume(self, key, capacity, period, now):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    calls.append('worker')
+                else:
+                    calls.append('event loop')
+                return 30
+
+        client = self.client_for(self.customer)
+        with mock.patch.object(APIView, 'throttle_classes', api_settings.DEFAULT_THROTTLE_CLASSES), \
+                mock.patch('LittleLemonDRF.throttling.get_bucket_store', return_value=Store()):
+            response = client.get('/api/cart/menu-items')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(set(calls), {'worker'})
+
+
+class OrderEventsTests(LittleLemonTestCase):
+    def test_event_stream_points_wsgi_clients_to_long_polling(self):
+        response = self.client_for(self.customer).get('/api/orders/events')
+        self.assertEqual(response.status_code, 501)
+        self.assertIn('/api/orders/events/poll', response.json()['detail'])
+
+    def test_long_polling_works_under_wsgi(self):
+        response = self.client_for(self.customer).get('/api/orders/events/poll', {'timeout': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['events'], [])
+
+
+class ExportTests(LittleLemonTestCase):
+    """Exports stream in batches under ASGI, with the same body as under WSGI."""
+
+    def setUp(self):
+        super().setUp()
+        # Small batches, so that orders straddle batch boundaries.
+        chunk_size = mock.patch('LittleLemonDRF.bulk.EXPORT_CHUNK_SIZE', 4)
+        chunk_size.start()
+        self.addCleanup(chunk_size.stop)
+        self.token = Token.objects.create(user=self.manager)
+
+    async def stream(self, path):
+        response = await AsyncClient().get(path, headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        return [chunk async for chunk in response.streaming_content]
+
+    def sync_body(self, path):
+        return b''.join(self.client_for(self.manager).get(path).streaming_content)
+
+    async def assertStreamsLikeWSGI(self, path):
+        chunks = await self.stream(path)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), await sync_to_async(self.sync_body)(path))
+        return chunks
+
+    async def test_order_export_streams_under_asgi(self):
+        await sync_to_async(self.create_orders)(5, items=3)
+        await sync_to_async(self.create_orders)(1, items=0)
+        chunks = await self.assertStreamsLikeWSGI('/api/orders/export')
+        orders = [json.loads(chunk) for chunk in chunks]
+        self.assertEqual([len(order['order_items']) for order in orders], [3] * 5 + [0])
+        self.assertEqual(len(await self.assertStreamsLikeWSGI('/api/orders/export?type=csv')), 1 + 5 * 3 + 1)
+
+    async def test_catalog_exports_stream_under_asgi(self):
+        chunks = await self.assertStreamsLikeWSGI('/api/menu-items/export')
+        self.assertEqual([json.loads(chunk)['title'] for chunk in chunks], [f'Dish {index}' for index in range(5)])
+        self.assertEqual(len(await self.assertStreamsLikeWSGI('/api/menu-items/export?type=csv')), 1 + 5)
+
+        for index in range(3):
+            await Category.objects.acreate(slug=f'category-{index}', title=f'Category {index}')
+        self.assertEqual(len(await self.assertStreamsLikeWSGI('/api/categories/export')), 4)
+        self.assertEqual(len(await self.assertStreamsLikeWSGI('/api/categories/export?type=csv')), 1 + 4)
+
+
+class ImportTests(LittleLemonTestCase):
+    def post(self, path, lines, content_type='application/x-ndjson'):
+        body = '\n'.join(json.dumps(line) if isinstance(line, dict) else line for line in lines)
+        return self.client_for(self.manager).post(path, body, content_type=content_type)
+
+    def test_ndjson_rows_are_upserted_in_batches(self):
+        dish = self.menu_items[0]
+        category = dish.category_id
+        rows = [
+            {'id': dish.pk, 'title': 'Renamed', 'price': '9.50', 'featured': True, 'category': category},
+            '',
+            *({'title': f'New {index}', 'price': '3', 'featured': False, 'category': category} for index in range(4)),
+        ]
+        with mock.patch.object(MenuItemImporter, 'batch_size', 2):
+            response = self.post('/api/menu-items/import', rows)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'created': 4, 'updated': 1})
+        dish.refresh_from_db()
+        self.assertEqual((dish.title, str(dish.price), dish.featured), ('Renamed', '9.50', True))
+        self.assertEqual(MenuItem.objects.filter(title__startswith='New ').count(), 4)
+
+    def test_csv_rows_treat_empty_cells_as_missing(self):
+        category = Category.objects.get()
+        response = self.post(
+            '/api/categories/import', ['id,slug,title', f'{category.pk},mains,Main courses', ',sides,Sides'], 'text/csv',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'created': 1, 'updated': 1})
+        self.assertEqual(
+            list(Category.objects.order_by('pk').values_list('slug', 'title')), [('mains', 'Main courses'), ('sides', 'Sides')],
+        )
+
+    def test_errors_are_reported_per_line_and_nothing_is_written(self):
+        category = self.menu_items[0].category_id
+        rows = [
+            {'title': 'Valid', 'price': '3', 'featured': False, 'category': category},
+            {'title': 'No price', 'featured': False, 'category': category},
+            {'title': 'Unknown category', 'price': '3', 'featured': False, 'category': 999},
+            {'id': self.menu_items[1].pk, 'title': 'First', 'price': '3', 'featured': False, 'category': category},
+            {'id': self.menu_items[1].pk, 'title': 'Twice', 'price': '3', 'featured': False, 'category': category},
+        ]
+        response = self.post('/api/menu-items/import', rows)
+        self.assertEqual(response.status_code, 400)
+        errors = {error['line']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 5])
+        self.assertIn('price', errors[2])
+        self.assertEqual(errors[3], {'category': ['Invalid pk "999" - object does not exist.']})
+        self.assertEqual(errors[5], {'id': ['Duplicate id in this import.']})
+        self.assertFalse(MenuItem.objects.filter(title__in=['Valid', 'First']).exists())
+
+    def test_rows_after_a_failed_batch_are_still_validated(self):
+        category = self.menu_items[0].category_id
+        rows = [{'title': 'Unknown category', 'price': '3', 'featured': False, 'category': 999}]
+        rows += [{'title': f'New {index}', 'price': '3', 'featured': False, 'category': category} for index in range(2)]
+        rows.append({'title': 'No price', 'featured': False, 'category': category})
+        with mock.patch.object(MenuItemImporter, 'batch_size', 2):
+            response = self.post('/api/menu-items/import', rows)
+        self.assertEqual([error['line'] for error in response.json()['errors']], [1, 4])
+        self.assertFalse(MenuItem.objects.filter(title__startswith='New ').exists())
+
+    def test_malformed_bodies_are_rejected(self):
+        response = self.post('/api/categories/import', [json.dumps({'slug': 'a', 'title': 'A'}), '{"slug":'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('line 2', response.json()['detail'])
+
+        response = self.post('/api/categories/import', ['slug,title'], 'application/xml')
+        self.assertEqual(response.status_code, 415)
+
+    def test_request_rows_keep_their_line_numbers(self):
+        request = Request(APIRequestFactory().post(
+            '/', 'slug,title\na,A\nb,\n', content_type='text/csv',
+        ))
+        self.assertEqual(list(iter_request_rows(request)), [(2, {'slug': 'a', 'title': 'A'}), (3, {'slug': 'b'})])
+
+
+def fill_cart(user, menu_items, quantity=2):
+    for menu_item in menu_items:
+        Cart.objects.create(
+            user=user, menuitem=menu_item, quantity=quantity, unit_price=menu_item.price, price=menu_item.price * quantity,
+        )
+
+
+class OrderQueueTests(LittleLemonTestCase):
+    def test_queued_checkout_returns_a_ticket_without_an_order(self):
+        fill_cart(self.customer, self.menu_items[:2])
+        client = self.client_for(self.customer)
+        with mock.patch('LittleLemonDRF.views.ORDER_INGESTION_MODE', 'queued'):
+            response = client.post('/api/orders')
+        self.assertEqual(response.status_code, 202)
+        ticket = response.json()
+        self.assertEqual((ticket['status'], ticket['order'], ticket['total']), ('pending', None, '6.00'))
+        self.assertEqual(response['Location'], f'/api/orders/tickets/{ticket["id"]}')
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+
+        process_tickets()
+        ticket = client.get(response['Location']).json()
+        self.assertEqual(ticket['status'], 'done')
+        self.assertEqual(ticket['order'], Order.objects.get().pk)
+
+    def test_processing_creates_the_order(self):
+        fill_cart(self.customer, self.menu_items[:3])
+        ticket = enqueue_order(self.customer)
+        self.assertIsNone(enqueue_order(self.customer))
+
+        self.assertEqual(process_tickets(), [ticket])
+        ticket.refresh_from_db()
+        order = Order.objects.get()
+        self.assertEqual((ticket.status, ticket.order, ticket.error), (CheckoutTicket.DONE, order, ''))
+        self.assertIsNotNone(ticket.processed)
+        self.assertEqual((order.user, order.total, order.status), (self.customer, 12, False))
+        self.assertEqual(
+            sorted(order.orderitem_set.values_list('menuitem_id', 'quantity', 'price')),
+            [(menu_item.pk, 2, menu_item.price * 2) for menu_item in self.menu_items[:3]],
+        )
+        self.assertFalse(Cart.objects.filter(user=self.customer).exists())
+        self.assertEqual(process_tickets(), [])
+
+    def test_tickets_that_cannot_become_orders_fail(self):
+        fill_cart(self.customer, self.menu_items[:1])
+        repriced = enqueue_order(self.customer)
+        fill_cart(self.customer, self.menu_items[1:2])
+        removed = enqueue_order(self.customer)
+        empty = CheckoutTicket.objects.create(user=self.customer, total=0, lines=[])
+        fill_cart(self.customer, self.menu_items[2:3])
+        valid = enqueue_order(self.customer)
+        MenuItem.objects.filter(pk=self.menu_items[0].pk).update(price=10)
+        self.menu_items[1].delete()
+
+        self.assertEqual(len(process_tickets()), 4)
+        errors = dict(CheckoutTicket.objects.values_list('pk', 'error'))
+        self.assertEqual(errors, {
+            repriced.pk: 'The price of a menu item changed since checkout.',
+            removed.pk: 'A menu item in the cart no longer exists.',
+            empty.pk: 'The cart was empty.',
+            valid.pk: '',
+        })
+        self.assertEqual(
+            set(CheckoutTicket.objects.filter(status=CheckoutTicket.FAILED).values_list('pk', flat=True)),
+            {repriced.pk, removed.pk, empty.pk},
+        )
+        self.assertEqual(Order.objects.get(), CheckoutTicket.objects.get(pk=valid.pk).order)
+
+
+class ConcurrentOrderQueueTests(TransactionTestCase):
+    def enqueue(self, tickets):
+        category = Category.objects.create(slug='mains', title='Mains')
+        menu_items = [
+            MenuItem.objects.create(title=f'Dish {index}', price=2, featured=False, category=category) for index in range(2)
+        ]
+        for index in range(tickets):
+            customer = User.objects.create_user(f'customer{index}')
+            fill_cart(customer, menu_items, quantity=1)
+            enqueue_order(customer)
+
+    def assertProcessedOnce(self, tickets):
+        self.assertEqual(Order.objects.count(), tickets)
+        self.assertEqual(OrderItem.objects.count(), tickets * 2)
+        self.assertFalse(CheckoutTicket.objects.exclude(status=CheckoutTicket.DONE).exists())
+        self.assertEqual(len(set(CheckoutTicket.objects.values_list('order', flat=True))), tickets)
+        self.assertEqual(DailySales.objects.get().order_count, tickets)
+
+    def test_workers_never_process_the_same_ticket(self):
+        tickets = 40
+        self.enqueue(tickets)
+
+        workers = 4
+        barrier = threading.Barrier(workers)
+        outcomes = []
+
+        def work():
+            barrier.wait()
+            outcomes.append(drain(batch_size=3, poll_interval=0, once=True))
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(done for done, _ in outcomes), tickets)
+        self.assertEqual(sum(failed for _, failed in outcomes), 0)
+        self.assertProcessedOnce(tickets)
+
+    def test_command_drains_the_queue_with_worker_processes(self):
+        self.enqueue(30)
+        # The command ignores Ctrl+C while its workers wind down.
+        self.addCleanup(signal.signal, signal.SIGINT, signal.getsignal(signal.SIGINT))
+        stdout = StringIO()
+        call_command('process_order_queue', workers=3, batch_size=4, once=True, stdout=stdout)
+        self.assertIn('Created 30 orders from the queue (0 tickets failed)', stdout.getvalue())
+        self.assertProcessedOnce(30)
+
+
+class MenuFacetTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        # With the Mains at 1-5 (0, 2 and 4 featured): one item per band above 5.
+        self.drinks = Category.objects.create(slug='drinks', title='Drinks')
+        for title, price, featured in [('Wine', 12, True), ('Champagne', 75, False), ('Port', '9.99', False)]:
+            MenuItem.objects.create(title=title, price=price, featured=featured, category=self.drinks)
+
+    def test_counts_match_the_menu(self):
+        mains = self.menu_items[0].category
+        self.assertEqual(self.client.get('/api/menu-items/facets').json(), {
+            'count': 8,
+            'categories': [
+                {'id': self.drinks.pk, 'title': 'Drinks', 'count': 3},
+                {'id': mains.pk, 'title': 'Mains', 'count': 5},
+            ],
+            'featured': 4,
+            'price': [
+                {'min': None, 'max': '5.00', 'count': 4},
+                {'min': '5.00', 'max': '10.00', 'count': 2},
+                {'min': '10.00', 'max': '20.00', 'count': 1},
+                {'min': '20.00', 'max': '50.00', 'count': 0},
+                {'min': '50.00', 'max': None, 'count': 1},
+            ],
+        })
+
+    def test_counts_follow_the_list_filters(self):
+        facets = self.client.get('/api/menu-items/facets', {'category': self.drinks.pk, 'featured': 'false'}).json()
+        self.assertEqual(facets['count'], 2)
+        self.assertEqual(facets['categories'], [{'id': self.drinks.pk, 'title': 'Drinks', 'count': 2}])
+        self.assertEqual([band['count'] for band in facets['price']], [0, 1, 0, 0, 1])
+
+    def test_facets_take_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/menu-items/facets').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/menu-items/facets').status_code, 200)
+
+    def test_menu_changes_through_the_api_refresh_the_facets(self):
+        manager = self.client_for(self.manager)
+
+        def count():
+            return self.client.get('/api/menu-items/facets').json()['count']
+
+        self.assertEqual(count(), 8)
+        response = manager.post(
+            '/api/menu-items', {'title': 'Soup', 'price': '4.00', 'featured': False, 'category': self.drinks.pk},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(count(), 9)
+
+        soup = response.json()['id']
+        self.assertEqual(manager.patch(f'/api/menu-items/{soup}', {'featured': True}).status_code, 200)
+        self.assertEqual(self.client.get('/api/menu-items/facets').json()['featured'], 5)
+
+        self.assertEqual(manager.delete(f'/api/menu-items/{soup}').status_code, 204)
+        self.assertEqual(count(), 8)
+
+
+class CatalogCacheTests(LittleLemonTestCase):
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.json()['results']]
+
+    def test_unchanged_menu_is_not_modified(self):
+        response = self.client.get('/api/menu-items')
+        etag = response['ETag']
+
+        response = self.client.get('/api/menu-items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get('/api/menu-items', headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/menu-items', headers={'If-Modified-Since': 'Thu, 01 Jan 2026 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_changes_through_the_api_change_the_etag(self):
+        manager = self.client_for(self.manager)
+        category = self.menu_items[0].category_id
+        item = self.menu_items[0].pk
+        changes = [
+            lambda: manager.post('/api/menu-items', {'title': 'Soup', 'price': '4.00', 'featured': False, 'category': category}),
+            lambda: manager.patch(f'/api/menu-items/{item}', {'title': 'Renamed'}),
+            lambda: manager.delete(f'/api/menu-items/{item}'),
+            lambda: manager.post(
+                '/api/categories/import', json.dumps({'slug': 'drinks', 'title': 'Drinks'}), content_type='application/x-ndjson',
+            ),
+        ]
+        for change in changes:
+            response = self.client.get('/api/menu-items')
+            etag, modified = response['ETag'], response['Last-Modified']
+            # Imports bump the version once their transaction commits.
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertLess(change().status_code, 300)
+            for headers in ({'If-None-Match': etag}, {'If-Modified-Since': modified}):
+                response = self.client.get('/api/menu-items', headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.titles(response)[0], 'Dish 1')
+
+    def test_entries_are_kept_per_query(self):
+        for index in range(5, 15):
+            MenuItem.objects.create(title=f'Dish {index}', price=1, featured=False, category=self.menu_items[0].category)
+        for _ in range(2):
+            self.assertEqual(self.titles(self.client.get('/api/menu-items')), [f'Dish {index}' for index in range(10)])
+            self.assertEqual(self.titles(self.client.get('/api/menu-items?page=2')), [f'Dish {index}' for index in range(10, 15)])
+            self.assertEqual(self.titles(self.client.get('/api/menu-items?search=Dish 12')), ['Dish 12'])
+            self.assertEqual(self.titles(self.client.get('/api/menu-items?search=Dish 13')), ['Dish 13'])
+
+    def test_entries_are_the_same_for_every_user(self):
+        expected = self.titles(self.client.get('/api/menu-items'))
+        for user in (self.customer, self.manager):
+            self.assertEqual(self.titles(self.client_for(user).get('/api/menu-items')), expected)
+        etag = self.client.get('/api/menu-items')['ETag']
+        response = self.client_for(self.customer).get('/api/menu-items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+class MenuSearchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.desserts = Category.objects.create(slug='desserts', title='Desserts')
+        self.lemon_drinks = Category.objects.create(slug='lemon-drinks', title='Lemon Drinks')
+        # Created first, so that only the ranking puts the tart ahead.
+        self.water = MenuItem.objects.create(title='Sparkling Water', price=2, featured=False, category=self.lemon_drinks)
+        self.tart = MenuItem.objects.create(title='Lemon Tart', price=6, featured=False, category=self.desserts)
+        self.pie = MenuItem.objects.create(title='Apple Pie', price=5, featured=False, category=self.desserts)
+
+    def search(self, term, **params):
+        response = self.client.get('/api/menu-items', {'search': term, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [item['title'] for item in response.json()['results']]
+
+    def test_terms_match_word_prefixes(self):
+        self.assertEqual(self.search('lem'), ['Lemon Tart', 'Sparkling Water'])
+        self.assertEqual(self.search('spark wat'), ['Sparkling Water'])
+        self.assertEqual(self.search('LEMON tar'), ['Lemon Tart'])
+        self.assertEqual(self.search('emon'), [])
+
+    def test_title_matches_rank_first(self):
+        # "Lemon Drinks" is as short a match as "Lemon Tart", in the category.
+        self.assertEqual(self.search('lemon'), ['Lemon Tart', 'Sparkling Water'])
+        self.assertEqual(self.search('dessert'), ['Lemon Tart', 'Apple Pie'])
+        self.assertEqual(self.search('lemon', ordering='-price'), ['Lemon Tart', 'Sparkling Water'])
+        self.assertEqual(self.search('lemon', ordering='price'), ['Sparkling Water', 'Lemon Tart'])
+
+        # Even a long title beats a short category title.
+        lemons = Category.objects.create(slug='lemons', title='Lemons')
+        MenuItem.objects.create(title='Still Water', price=2, featured=False, category=lemons)
+        MenuItem.objects.create(title='Lemon Meringue Pie With Cream', price=6, featured=False, category=self.desserts)
+        self.assertEqual(self.search('lemon')[:2], ['Lemon Tart', 'Lemon Meringue Pie With Cream'])
+
+    def test_fts_syntax_in_terms_is_literal(self):
+        for term in ['"', '"lemon', 'lemon"', '*', 'lemon*', '(lemon', 'lemon OR pie', 'NOT pie', 'title:pie', '-', '^lemon', "l'emon", 'lemon + -']:
+            with self.subTest(term=term):
+                self.search(term)
+        self.assertEqual(self.search('"lemon" (tart)'), ['Lemon Tart'])
+
+    def test_index_follows_writes(self):
+        self.assertEqual(self.search('cake'), [])
+        cake = MenuItem.objects.create(title='Cheese Cake', price=7, featured=False, category=self.desserts)
+        self.assertEqual(self.search('cake'), ['Cheese Cake'])
+
+        cake.title = 'Cheese Board'
+        cake.save()
+        self.assertEqual(self.search('cake'), [])
+        self.assertEqual(self.search('board'), ['Cheese Board'])
+
+        cake.category = self.lemon_drinks
+        cake.save()
+        self.assertEqual(self.search('dessert cheese'), [])
+        self.assertEqual(self.search('drinks cheese'), ['Cheese Board'])
+
+        self.lemon_drinks.title = 'Citrus'
+        self.lemon_drinks.save()
+        self.assertEqual(self.search('citrus'), ['Sparkling Water', 'Cheese Board'])
+
+        cake.delete()
+        self.assertEqual(self.search('cheese'), [])
+
+
+class KeysetPaginationTests(LittleLemonTestCase):
+    ORDERINGS = ['', 'date', '-date', 'total', '-total', 'status', '-status']
+
+    def setUp(self):
+        super().setUp()
+        # Few distinct dates, totals and statuses: most pages end inside a tie.
+        orders = self.create_orders(23, items=1)
+        for index, order in enumerate(orders):
+            order.date = date(2026, 1, 1 + index % 3)
+            order.total = index % 4
+            order.status = index % 2 == 0
+        Order.objects.bulk_update(orders, ['date', 'total', 'status'])
+        self.client = self.client_for(self.manager)
+
+    def walk(self, url, link):
+        """The ids of each page from ``url`` on, following ``link``, and the URL of the last one."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([order['id'] for order in response.json()['results']])
+            url, last = response.json()[link], url
+        return pages, last
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        for ordering in self.ORDERINGS:
+            with self.subTest(ordering=ordering):
+                query = f'/api/orders?pagination=cursor&ordering={ordering}'
+                expected = self.walk(f'{query}&page_size=100', 'next')[0][0]
+                self.assertEqual(len(expected), 23)
+
+                forward, last = self.walk(f'{query}&page_size=4', 'next')
+                self.assertEqual([len(page) for page in forward], [4, 4, 4, 4, 4, 3])
+                self.assertEqual(sum(forward, []), expected)
+
+                backward, _ = self.walk(last, 'previous')
+                self.assertEqual(backward[::-1], forward)
+
+    def test_menu_items_page_by_their_ordering(self):
+        for index in range(5, 12):
+            MenuItem.objects.create(title=f'Dish {index}', price=index % 3 + 1, featured=False, category=self.menu_items[0].category)
+        expected = list(MenuItem.objects.order_by('-price', '-pk').values_list('title', flat=True))
+        url = '/api/menu-items?pagination=cursor&ordering=-price&page_size=5'
+        titles = []
+        while url:
+            body = self.client.get(url).json()
+            titles += [item['title'] for item in body['results']]
+            url = body['next']
+        self.assertEqual(titles, expected)
+
+    def test_invalid_cursors_are_not_found(self):
+        cursors = ['x', '!!!', 'e30', 'W10', 'eyJwIjpudWxsfQ', 'eyJwIjpbIngiLDFdfQ', 'eyJwIjpbbnVsbCwxXX0', 'eyJwIjpbWzFdLFsxXV19']
+        for cursor in cursors:
+            for ordering in ('-date', 'total', 'status'):
+                with self.subTest(cursor=cursor, ordering=ordering):
+                    response = self.client.get(f'/api/orders?ordering={ordering}&cursor={cursor}')
+                    self.assertEqual(response.status_code, 404)
+                    self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+class TokenCacheTests(LittleLemonTestCase):
+    # An async and a sync view, which authenticate through different paths.
+    PATHS = ['/api/orders', '/api/users/me/']
+
+    def assertAuthenticated(self, client, expected=True):
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(client.get(path).status_code, 200 if expected else 401)
+
+    def warm(self, user):
+        client = self.client_for(user)
+        self.assertAuthenticated(client)
+        client.get('/api/menu-items?page_size=1')
+        # The token, like the menu, is served from the cache from now on.
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/menu-items?page_size=1').status_code, 200)
+        return client
+
+    def test_logout_revokes_the_token_at_once(self):
+        client = self.warm(self.customer)
+        self.assertEqual(client.post('/token/logout/').status_code, 204)
+        self.assertAuthenticated(client, expected=False)
+
+    def test_deleted_token_is_rejected_at_once(self):
+        client = self.warm(self.customer)
+        Token.objects.filter(user=self.customer).delete()
+        self.assertAuthenticated(client, expected=False)
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        client = self.warm(self.customer)
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertAuthenticated(client, expected=False)
+
+    def test_revocations_reach_other_processes_through_the_shared_cache(self):
+        with mock.patch('LittleLemonDRF.authentication.TOKEN_CACHE_SHARED', 'default'):
+            client = self.warm(self.customer)
+            # As if the revocation ran in another worker: only the shared
+            # revision marker changes, not this process's cache.
+            with mock.patch.object(token_cache, 'discard'), mock.patch.object(token_cache, 'discard_user'):
+                Token.objects.filter(user=self.customer).delete()
+            self.assertAuthenticated(client, expected=False)
+
+    def test_shared_cache_is_the_default_unless_process_local(self):
+        self.assertFalse(is_shared_cache())
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}):
+            self.assertTrue(is_shared_cache())
+
+
+class CartBatchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.customer)
+
+    def cart(self):
+        return dict(Cart.objects.filter(user=self.customer).values_list('menuitem_id', 'quantity'))
+
+    def test_lines_are_upserted_together(self):
+        first, second, third = (menu_item.pk for menu_item in self.menu_items[:3])
+        self.client.post('/api/cart/menu-items', {'menuitem': first, 'quantity': 1}, format='json')
+        response = self.client.post('/api/cart/menu-items', [
+            {'menuitem': first, 'quantity': 4}, {'menuitem': second, 'quantity': 1}, {'menuitem': third, 'quantity': 2},
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([line['menuitem'] for line in response.json()], [first, second, third])
+        self.assertEqual(self.cart(), {first: 4, second: 1, third: 2})
+        self.assertEqual(Cart.objects.get(user=self.customer, menuitem=third).price, 6)
+
+    def test_invalid_lines_are_reported_and_nothing_is_applied(self):
+        first, second = self.menu_items[0].pk, self.menu_items[1].pk
+        self.client.post('/api/cart/menu-items', {'menuitem': first, 'quantity': 1}, format='json')
+
+        response = self.client.post('/api/cart/menu-items', [
+            {'menuitem': first, 'quantity': 3}, {'menuitem': second, 'quantity': 0}, {'menuitem': second},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        # Keyed by the index of each invalid line, as ListSerializer does.
+        errors = response.json()
+        self.assertEqual(sorted(errors), ['1', '2'])
+        self.assertEqual(list(errors['1']), ['quantity'])
+        self.assertEqual(list(errors['2']), ['quantity'])
+
+        response = self.client.post('/api/cart/menu-items', [
+            {'menuitem': first, 'quantity': 3}, {'menuitem': 999, 'quantity': 1}, {'menuitem': first, 'quantity': 1},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            '1': {'menuitem': ['Invalid pk "999" - object does not exist.']},
+            '2': {'menuitem': ['Menu item appears more than once in this request.']},
+        })
+        self.assertEqual(self.cart(), {first: 1})
+
+    def test_single_lines_keep_their_error_shape(self):
+        response = self.client.post('/api/cart/menu-items', {'menuitem': 999, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'menuitem': ['Invalid pk "999" - object does not exist.']})
+        response = self.client.post('/api/cart/menu-items', [], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cart(), {})
+
+
+class SparseFieldsTests(LittleLemonTestCase):
+    def test_fields_pick_the_keys(self):
+        item = self.menu_items[0]
+        response = self.client.get('/api/menu-items?fields=id,title')
+        self.assertEqual(response.json()['results'][0], {'id': item.pk, 'title': item.title})
+        response = self.client.get(f'/api/menu-items/{item.pk}?fields=price')
+        self.assertEqual(response.json(), {'price': '1.00'})
+
+        self.create_orders(1, items=2)
+        order = self.client_for(self.customer).get('/api/orders?fields=id,order_items.quantity').json()['results'][0]
+        self.assertEqual(list(order), ['id', 'order_items'])
+        self.assertEqual(order['order_items'], [{'quantity': 1}, {'quantity': 1}])
+
+    def test_unknown_fields_are_rejected(self):
+        for path, param, name in [
+            ('/api/menu-items?fields=id,titel', 'fields', 'titel'),
+            (f'/api/menu-items/{self.menu_items[0].pk}?fields=titel', 'fields', 'titel'),
+            ('/api/menu-items?expand=categroy', 'expand', 'categroy'),
+            ('/api/orders?fields=id,order_items.quantiy', 'fields', 'order_items.quantiy'),
+            ('/api/orders?expand=order_items.menu', 'expand', 'order_items.menu'),
+        ]:
+            with self.subTest(path=path):
+                response = self.client_for(self.customer).get(path)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {param: [f'Unknown field: {name}.']})
+
+    def test_expanding_the_category_takes_no_extra_queries(self):
+        item = self.menu_items[0]
+        response = self.client.get(f'/api/menu-items/{item.pk}?expand=category')
+        self.assertEqual(response.json()['category'], {'id': item.category_id, 'slug': 'mains', 'title': 'Mains'})
+
+        for count in (1, 10):
+            for _ in range(count):
+                category = Category.objects.create(slug=f'c{Category.objects.count()}', title='More')
+                MenuItem.objects.create(title='More', price=1, featured=False, category=category)
+            cache.clear()
+            # The page count and the items joined to their categories.
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/menu-items?expand=category&page_size=100')
+            self.assertTrue(all(isinstance(item['category'], dict) for item in response.json()['results']))
+
+
+class ValuesSerializerTests(LittleLemonTestCase):
+    """The values() fast path renders exactly what the serializer it replaces renders."""
+    QUERIES = {
+        MenuItemSerializer: ['', 'fields=id,price', 'expand=category', 'fields=title,category.slug&expand=category'],
+        OrderSerializer: [
+            '', 'fields=id,total,date', 'expand=order_items.menuitem',
+            'fields=date,order_items.price&expand=order_items.menuitem', 'expand=order_items.menuitem.category',
+        ],
+        CartSerializer: ['', 'fields=menuitem,price', 'fields=unit_price,quantity'],
+    }
+
+    def setUp(self):
+        super().setUp()
+        MenuItem.objects.filter(pk=self.menu_items[0].pk).update(price='12.50')
+        orders = self.create_orders(3, items=2)
+        Order.objects.filter(pk=orders[0].pk).update(delivery_crew=self.crew, status=True, total='7.25')
+        for menu_item in MenuItem.objects.all()[:3]:
+            Cart.objects.create(user=self.customer, menuitem=menu_item, quantity=3, unit_price=menu_item.price, price=menu_item.price * 3)
+
+    def test_output_matches_the_serializer(self):
+        querysets = {
+            MenuItemSerializer: MenuItem.objects.order_by('pk'),
+            OrderSerializer: Order.objects.order_by('-date', 'pk'),
+            CartSerializer: Cart.objects.order_by('pk'),
+        }
+        for serializer_class, queries in self.QUERIES.items():
+            for query in queries:
+                with self.subTest(serializer=serializer_class.__name__, query=query):
+                    context = {'request': Request(APIRequestFactory().get(f'/?{query}'))}
+                    values = ValuesSerializer.for_serializer(serializer_class(context=context))
+                    self.assertIsNotNone(values)
+                    queryset = querysets[serializer_class]
+                    expected = serializer_class(queryset, many=True, context=context).data
+                    self.assertEqual(values.serialize(values.values(queryset)), expected)
+                    self.assertEqual(
+                        JSONRenderer().render(values.serialize(values.values(queryset))), JSONRenderer().render(expected),
+                    )
+
+    def test_decimals_and_dates_are_formatted(self):
+        values = ValuesSerializer.for_serializer(OrderSerializer())
+        order = values.serialize(values.values(Order.objects.filter(total='7.25')))[0]
+        self.assertEqual((order['total'], order['date'], order['status']), ('7.25', '2026-01-01', True))
+        self.assertEqual(order['order_items'][0]['unit_price'], '1.00')
+
+
+class DispatchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        crew = Group.objects.get(name=DELIVERY_CREW)
+        self.crew2 = User.objects.create_user('crew2')
+        self.crew3 = User.objects.create_user('crew3')
+        crew.user_set.add(self.crew2, self.crew3)
+        self.manager_client = self.client_for(self.manager)
+
+    def assign(self, orders, crew, status=False):
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(delivery_crew=crew, status=status)
+
+    def open_loads(self):
+        return {
+            crew.username: Order.objects.filter(delivery_crew=crew, status=False).count()
+            for crew in (self.crew, self.crew2, self.crew3)
+        }
+
+    def updates(self, queries):
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+
+    def test_orders_go_to_the_least_loaded_crew(self):
+        orders = self.create_orders(12, items=1)
+        self.assign(orders[:2], self.crew)
+        self.assign(orders[2:3], self.crew3)
+        # Delivered orders are no load, and are not dispatched.
+        self.assign(orders[3:6], self.crew2, status=True)
+        delivered = orders[6]
+        self.assign([delivered], None, status=True)
+        pending = orders[7:]
+
+        with mock.patch('LittleLemonDRF.dispatch.publish') as publish, CaptureQueriesContext(connection) as queries:
+            response = self.manager_client.post('/api/orders/dispatch')
+        self.assertEqual(response.status_code, 200)
+        # Oldest first, each to the member with the fewest open orders, ties to the lowest id.
+        crew, crew2, crew3 = self.crew.pk, self.crew2.pk, self.crew3.pk
+        self.assertEqual(response.json(), {'assigned': 5, 'assignments': [
+            {'order': order.pk, 'delivery_crew': crew_id}
+            for order, crew_id in zip(pending, [crew2, crew2, crew3, crew, crew2])
+        ]})
+        self.assertEqual(self.open_loads(), {'crew': 3, 'crew2': 3, 'crew3': 2})
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertIn('CASE WHEN', self.updates(queries)[0])
+
+        self.assertEqual(
+            list(Order.objects.filter(pk__in=[order.pk for order in orders[:7]]).order_by('pk').values_list('delivery_crew', flat=True)),
+            [crew, crew, crew3, crew2, crew2, crew2, None],
+        )
+        events = [event for call in publish.call_args_list for event in call.args]
+        self.assertEqual(
+            [(event['type'], event['order'], event['delivery_crew']) for event in events],
+            [('order.updated', item['order'], item['delivery_crew']) for item in response.json()['assignments']],
+        )
+        self.assertEqual(self.manager_client.post('/api/orders/dispatch').json(), {'assigned': 0, 'assignments': []})
+
+    def test_dispatch_limit(self):
+        pending = self.create_orders(3, items=1)
+        response = self.manager_client.post('/api/orders/dispatch', {'limit': 2})
+        self.assertEqual([item['order'] for item in response.json()['assignments']], [pending[0].pk, pending[1].pk])
+        self.assertIsNone(Order.objects.get(pk=pending[2].pk).delivery_crew)
+
+    def test_assignments_report_the_previous_crew(self):
+        first, second = self.create_orders(2, items=1)
+        self.assign([first], self.crew)
+        assignments = [{'order': first.pk, 'delivery_crew': self.crew2.pk}, {'order': second.pk, 'delivery_crew': self.crew2.pk}]
+        with mock.patch('LittleLemonDRF.dispatch.publish') as publish, CaptureQueriesContext(connection) as queries:
+            response = self.manager_client.post('/api/orders/assign', {'assignments': assignments}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'assigned': 2})
+        self.assertEqual(self.open_loads(), {'crew': 0, 'crew2': 2, 'crew3': 0})
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertEqual(list(publish.call_args.args), [
+            {'type': 'order.updated', 'order': first.pk, 'user': self.customer.pk, 'delivery_crew': self.crew2.pk,
+             'status': False, 'previous_delivery_crew': self.crew.pk},
+            {'type': 'order.updated', 'order': second.pk, 'user': self.customer.pk, 'delivery_crew': self.crew2.pk,
+             'status': False},
+        ])
+
+    def test_invalid_assignments_change_nothing(self):
+        first, second = self.create_orders(2, items=1)
+        assignments = [
+            {'order': first.pk, 'delivery_crew': self.crew.pk},
+            {'order': second.pk, 'delivery_crew': self.customer.pk},
+            {'order': 999, 'delivery_crew': self.crew.pk},
+        ]
+        response = self.manager_client.post('/api/orders/assign', {'assignments': assignments}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': [
+            {'order': second.pk, 'detail': 'Assigned user is not in Delivery Crew.'},
+            {'order': 999, 'detail': 'Order not found.'},
+        ]})
+        self.assertFalse(Order.objects.filter(delivery_crew__isnull=False).exists())
+
+    def test_only_managers_dispatch(self):
+        order = self.create_orders(1, items=1)[0]
+        for user in (self.customer, self.crew):
+            client = self.client_for(user)
+            with self.subTest(user=user.username):
+                self.assertEqual(client.post('/api/orders/dispatch').status_code, 403)
+                response = client.post(
+                    '/api/orders/assign', {'assignments': [{'order': order.pk, 'delivery_crew': self.crew.pk}]}, format='json',
+                )
+                self.assertEqual(response.status_code, 403)
+        self.assertIsNone(Order.objects.get().delivery_crew)
+
+
+class OrderStatusTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_crew = User.objects.create_user('other-crew')
+        self.other_crew.groups.add(Group.objects.get(name=DELIVERY_CREW))
+        self.mine, self.theirs, self.unassigned = self.create_orders(3, items=1)
+        Order.objects.filter(pk=self.mine.pk).update(delivery_crew=self.crew)
+        Order.objects.filter(pk=self.theirs.pk).update(delivery_crew=self.other_crew)
+
+    def patch(self, user, data):
+        return self.client_for(user).patch('/api/orders/status', data, format='json')
+
+    def statuses(self):
+        return dict(Order.objects.values_list('pk', 'status'))
+
+    def test_crew_only_update_their_own_orders(self):
+        client = self.client_for(self.crew)
+        client.get('/api/orders')
+        data = {'orders': [self.mine.pk, self.theirs.pk, self.unassigned.pk, 999, self.mine.pk], 'status': True}
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch('/api/orders/status', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [
+            {'order': self.mine.pk, 'updated': True},
+            {'order': self.theirs.pk, 'updated': False, 'detail': 'You are not assigned to this order.'},
+            {'order': self.unassigned.pk, 'updated': False, 'detail': 'You are not assigned to this order.'},
+            {'order': 999, 'updated': False, 'detail': 'Order not found.'},
+        ]})
+        self.assertEqual(self.statuses(), {self.mine.pk: True, self.theirs.pk: False, self.unassigned.pk: False})
+        # One SELECT of the orders and one UPDATE of them all, in a transaction
+        # (a savepoint inside the test's own).
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual(statements, ['SAVEPOINT', 'SELECT', 'UPDATE', 'RELEASE'])
+
+    def test_managers_update_any_order_in_one_statement(self):
+        data = {'orders': [self.mine.pk, self.theirs.pk, self.unassigned.pk], 'status': True}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(self.manager, data)
+        self.assertTrue(all(result['updated'] for result in response.json()['results']))
+        self.assertEqual(set(self.statuses().values()), {True})
+        self.assertEqual(len([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]), 1)
+
+    def test_invalid_requests_change_nothing(self):
+        for data in [
+            {'orders': [self.mine.pk], 'status': 'maybe'},
+            {'orders': [self.mine.pk], 'status': None},
+            {'orders': [self.mine.pk]},
+            {'orders': [], 'status': True},
+            {'orders': ['first'], 'status': True},
+            {'orders': self.mine.pk, 'status': True},
+        ]:
+            with self.subTest(data=data):
+                response = self.patch(self.crew, data)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(self.statuses().values()), {False})
+
+    def test_customers_are_forbidden(self):
+        response = self.patch(self.customer, {'orders': [self.mine.pk], 'status': True})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(set(self.statuses().values()), {False})
+
+
+@override_settings(REPLICA_DATABASES=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_a_replica_only_when_allowed(self):
+        self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+        token = _replica_reads.set(True)
+        self.addCleanup(_replica_reads.reset, token)
+        self.assertIn(self.router.db_for_read(MenuItem), ['replica1', 'replica2'])
+        # Inside a transaction, reads see its own writes.
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+
+    def test_writes_and_migrations_go_to_the_primary(self):
+        token = _replica_reads.set(True)
+        self.addCleanup(_replica_reads.reset, token)
+        self.assertEqual(self.router.db_for_write(MenuItem), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'LittleLemonDRF'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'LittleLemonDRF'))
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaStickinessTests(TransactionTestCase):
+    """Which database each read of a request is routed to; they all actually run on ``default``."""
+
+    def setUp(self):
+        cache.clear()
+        throttles = mock.patch.object(APIView, 'throttle_classes', [])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+        self.customer = User.objects.create_user('customer')
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.menu_item = MenuItem.objects.create(title='Dish', price=2, featured=False, category=category)
+        self.token = Token.objects.create(user=self.customer)
+
+        self.routes = []
+        route = PrimaryReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.routes.append(route(router, model, **hints))
+            return 'default'
+
+        router = mock.patch.object(PrimaryReplicaRouter, 'db_for_read', autospec=True, side_effect=record)
+        router.start()
+        self.addCleanup(router.stop)
+
+    def client_for(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        return client
+
+    def reads(self, client, path):
+        self.routes.clear()
+        self.assertEqual(client.get(path).status_code, 200)
+        self.assertTrue(self.routes)
+        return set(self.routes)
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        client = self.client_for()
+        self.assertEqual(self.reads(client, '/api/cart/menu-items'), {'replica'})
+        self.assertEqual(self.reads(client, '/api/menu-items?page=1'), {'replica'})
+
+        response = client.post('/api/cart/menu-items', {'menuitem': self.menu_item.pk, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[REPLICA_STICKY_COOKIE]
+        self.assertEqual((cookie['max-age'], cookie['httponly']), (5, True))
+        self.assertEqual(self.reads(client, '/api/cart/menu-items'), {'default'})
+        self.assertEqual(self.reads(client, '/api/menu-items?page_size=5'), {'default'})
+
+        # Another session of the same user, e.g. on another device, is not held back.
+        self.assertEqual(self.reads(self.client_for(), '/api/cart/menu-items'), {'replica'})
+
+    def test_stickiness_expires(self):
+        client = self.client_for()
+        client.post('/api/cart/menu-items', {'menuitem': self.menu_item.pk, 'quantity': 1}, format='json')
+        with mock.patch('LittleLemonDRF.db_routers.time.time', return_value=time.time() + 6):
+            self.assertEqual(self.reads(client, '/api/cart/menu-items'), {'replica'})
+
+        client.cookies[REPLICA_STICKY_COOKIE] = 'forever'
+        self.assertEqual(self.reads(client, '/api/cart/menu-items'), {'replica'})
+
+
+class PerformanceTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def server_timing(self, response):
+        timings = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, duration = entry.split(';')[:2]
+            self.assertTrue(duration.startswith('dur='))
+            timings[name] = float(duration[len('dur='):])
+        return timings
+
+    def test_server_timing_header(self):
+        self.create_orders(2)
+        for client, path in [
+            (self.client_for(self.customer), '/api/menu-items'),
+            (self.client_for(self.customer), '/api/orders'),
+            (self.client_for(self.customer), '/api/cart/menu-items'),
+            (APIClient(), '/api/menu-items/1'),
+        ]:
+            with self.subTest(path=path):
+                response = client.get(path)
+                self.assertEqual(response.status_code, 200)
+                timings = self.server_timing(response)
+                self.assertEqual(list(timings), ['total', 'db', 'serialize', 'render'])
+                self.assertGreaterEqual(timings['total'], timings['serialize'] + timings['render'])
+
+    def test_serialization_is_timed_once(self):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        self.addCleanup(_current.reset, token)
+        inner = timed_serialization(lambda: None)
+        outer = timed_serialization(lambda: inner())
+        with mock.patch('LittleLemonDRF.performance.time.perf_counter', side_effect=[10.0, 10.5]):
+            outer()
+        self.assertEqual(metrics.serialize_time, 0.5)
+
+        order = self.create_orders(1)[0]
+        OrderSerializer(order).data
+        self.assertGreater(metrics.serialize_time, 0.5)
+        elapsed = metrics.serialize_time
+        values = ValuesSerializer.for_serializer(OrderSerializer())
+        values.serialize(values.values(Order.objects.filter(pk=order.pk)))
+        self.assertGreater(metrics.serialize_time, elapsed)
+        self.assertFalse(metrics.serializing)
+
+    def test_stats_are_for_managers_only(self):
+        self.client_for(self.customer).get('/api/menu-items')
+        self.assertEqual(APIClient().get('/api/performance/stats').status_code, 401)
+        for user in [self.customer, self.crew]:
+            self.assertEqual(self.client_for(user).get('/api/performance/stats').status_code, 403)
+            self.assertEqual(self.client_for(user).delete('/api/performance/stats').status_code, 403)
+
+        response = self.client_for(self.manager).get('/api/performance/stats')
+        self.assertEqual(response.status_code, 200)
+        menu = next(endpoint for endpoint in response.data['endpoints'] if endpoint['route'] == 'api/menu-items')
+        self.assertEqual((menu['method'], menu['requests'], menu['errors']), ('GET', 1, 0))
+        self.assertEqual(
+            set(menu), {'method', 'route', 'requests', 'errors', 'total_ms', 'wall_ms', 'db_ms', 'serialize_ms', 'render_ms', 'queries'},
+        )
+
+        self.assertEqual(self.client_for(self.manager).delete('/api/performance/stats').status_code, 204)
+        # Only the reset itself is left.
+        self.assertEqual([endpoint['route'] for endpoint in registry.snapshot()], ['api/performance/stats'])
@@ -0,0 +1,177 @@
+import math
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by every worker on the host.
+
+    Each request is one UPSERT that refills the bucket for the time elapsed,
+    takes a token if there is one and reports the outcome, so the check is
+    atomic across processes and costs the same whatever the rate.
+    """
+
+    CONSUME_SQL = '''
+        INSERT INTO throttle_bucket (key, tokens, updated, full_at, allowed)
+        VALUES (:key, :capacity - 1, :now, :now + 1 / :rate, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:capacity, tokens + max(:now - updated, 0) * :rate)
+                - (min(:capacity, tokens + max(:now - updated, 0) * :rate) >= 1),
+            allowed = min(:capacity, tokens + max(:now - updated, 0) * :rate) >= 1,
+            full_at = :now + (:capacity - min(:capacity, tokens + max(:now - updated, 0) * :rate)
+                + (min(:capacity, tokens + max(:now - updated, 0) * :rate) >= 1)) / :rate,
+            updated = :now
+        RETURNING tokens, allowed
+    '''
+    # A bucket that has refilled completely is the same as no bucket.
+    PURGE_SQL = 'DELETE FROM throttle_bucket WHERE full_at < ?'
+    PURGE_PROBABILITY = 0.001
+
+    def __init__(self, path, timeout=5):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+                'full_at REAL NOT NULL, allowed INTEGER NOT NULL) WITHOUT ROWID'
+            )
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, period, now):
+        rate = capacity / period
+        connection = self.connection()
+        tokens, allowed = connection.execute(
+            self.CONSUME_SQL, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now},
+        ).fetchone()
+        if random.random() < self.PURGE_PROBABILITY:
+            connection.execute(self.PURGE_SQL, (now,))
+        return None if allowed else (1 - tokens) / rate
+
+
+class CacheBucketStore:
+    """Token buckets in a Django cache, for deployments with a shared cache.
+
+    Buckets are read and written back without a lock, so concurrent requests
+    from one client can overshoot the limit slightly; use SQLiteBucketStore
+    where exact limits matter and the workers share a host.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, period, now):
+        rate = capacity / period
+        tokens, updated = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / rate) + 1)
+        return None if allowed else (1 - tokens) / rate
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """Return the store configured by THROTTLE_STORE, built on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = getattr(settings, 'THROTTLE_STORE', {
+                    'BACKEND': 'LittleLemonDRF.throttling.SQLiteBucketStore',
+                    'OPTIONS': {'path': settings.BASE_DIR / 'throttle.sqlite3'},
+                })
+                try:
+                    backend = import_string(config['BACKEND'])
+                except (ImportError, KeyError) as exc:
+                    raise ImproperlyConfigured(f'Invalid THROTTLE_STORE: {exc}')
+                _store = backend(**config.get('OPTIONS', {}))
+    return _store
+
+
+class TokenBucketMixin:
+    """Replace SimpleRateThrottle's request history with a token bucket.
+
+    A rate of ``N/period`` becomes a bucket of N tokens that refills at
+    N per period: bursts up to N are allowed, the sustained rate is the
+    same, and every check is O(1) in the shared bucket store.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.wait_seconds = get_bucket_store().consume(self.key, self.num_requests, self.duration, self.timer())
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonTokenBucketThrottle(TokenBucketMixin, AnonRateThrottle):
+    pass
+
+
+class UserTokenBucketThrottle(TokenBucketMixin, UserRateThrottle):
+    pass
+
+
+class ScopedTokenBucketThrottle(TokenBucketMixin, SimpleRateThrottle):
+    """Per-endpoint budgets taken from the view's ``throttle_scope``.
+
+    A view with ``throttle_scope = 'menu'`` is limited by the ``menu.read``
+    rate for safe methods and the ``menu.write`` rate otherwise, falling
+    back to a plain ``menu`` rate. Views without a scope are not limited.
+    """
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # The scope, and with it the rate, depends on the view and method.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        if self.scope is None:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_scope(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        if scope is None:
+            return None
+        operation = f'{scope}.{"read" if request.method in SAFE_METHODS else "write"}'
+        return operation if operation in self.THROTTLE_RATES else scope
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
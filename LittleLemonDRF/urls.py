@@ -1,5 +1,8 @@
 from rest_framework.routers import DefaultRouter 
-from .views import CartView, GroupDeliveryCrewUsersView, GroupManagerUsersView, MenuItemViewSet, OrderDetailView, OrderView
+from .views import (
+    CartView, CategoryExportView, CheckoutTicketView, CategoryImportView, GroupDeliveryCrewUsersView, GroupManagerUsersView, MenuItemViewSet, OrderAssignView,
+    OrderDetailView, OrderDispatchView, OrderEventsPollView, OrderEventsView, OrderExportView, OrderStatusView, OrderView, PerformanceStatsView, SalesAnalyticsView, TopMenuItemsView,
+)
 from django.urls import path
 
 router = DefaultRouter(trailing_slash=False)
@@ -10,7 +13,19 @@ urlpatterns = [
     path('groups/manager/users/<int:user_id>', GroupManagerUsersView.as_view()),
     path('groups/delivery-crew/users', GroupDeliveryCrewUsersView.as_view()),
     path('groups/delivery-crew/users/<int:user_id>', GroupDeliveryCrewUsersView.as_view()),
+    path('categories/import', CategoryImportView.as_view()),
+    path('categories/export', CategoryExportView.as_view()),
     path('cart/menu-items', CartView.as_view()),
     path('orders', OrderView.as_view()),
+    path('orders/export', OrderExportView.as_view()),
+    path('orders/dispatch', OrderDispatchView.as_view()),
+    path('orders/assign', OrderAssignView.as_view()),
+    path('orders/status', OrderStatusView.as_view()),
+    path('orders/events', OrderEventsView.as_view()),
+    path('orders/events/poll', OrderEventsPollView.as_view()),
+    path('orders/tickets/<int:ticket_id>', CheckoutTicketView.as_view()),
     path('orders/<int:order_id>', OrderDetailView.as_view()),
+    path('analytics/sales', SalesAnalyticsView.as_view()),
+    path('analytics/top-items', TopMenuItemsView.as_view()),
+    path('performance/stats', PerformanceStatsView.as_view()),
 ] + router.urls
\ No newline at end of file
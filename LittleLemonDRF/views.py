@@ -4,41 +4,107 @@ from django.shortcuts import render
 # restaurant/views.py
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .permissions import IsCustomer, IsManager, IsDeliveryCrew
+from .roles import DELIVERY_CREW, aget_roles, aget_user_roles
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from .models import Cart, MenuItem, Order
-from .serializers import CartSerializer, MenuItemSerializer, OrderSerializer
+from .bulk import CategoryImporter, MenuItemImporter, export_response, import_response, order_export_response
+from .caching import CatalogCacheMixin
+from .dispatch import assign_orders, dispatch_orders
+from .events import broker, event_stream, order_event, publish, subscription_keys, wait_for_events
+from .facets import menu_facets
+from .fastpath import ValuesListMixin, ValuesSerializer
+from .ingestion import ORDER_INGESTION_MODE, enqueue_order
+from .models import Cart, Category, CheckoutTicket, DailySales, MenuItem, MenuItemDailySales, Order
+from .orders import CheckoutConflict, delete_order, place_order, update_order_status
+from .serializers import (
+    BulkAssignSerializer, BulkStatusSerializer, CartLineSerializer, CartSerializer, CheckoutTicketSerializer, DateRangeSerializer, DispatchSerializer,
+    EventPollSerializer, MenuItemSalesSerializer, MenuItemSerializer, OrderSerializer, SalesSummarySerializer,
+    TopMenuItemsQuerySerializer, sparse_queryset,
+)
 from rest_framework.views import APIView
+from .async_views import AsyncAPIView
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from rest_framework import status
+from decimal import Decimal
+from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from .pagination import StandardResultsSetPagination, get_paginator
+from .performance import registry
+from .search import MenuItemSearchFilter
 
 User = get_user_model()
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+MENU_ITEM_EXPORT_FIELDS = ('id', 'title', 'price', 'featured', 'category')
+CATEGORY_EXPORT_FIELDS = ('id', 'slug', 'title')
 
-class MenuItemViewSet(ModelViewSet):
+
+class MenuItemViewSet(CatalogCacheMixin, ValuesListMixin, ModelViewSet):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, MenuItemSearchFilter]
     filterset_fields = ['category', 'featured', 'price']
     ordering_fields = ['price', 'title', 'featured']
+    # Pages need a stable order; ?search= ranks by relevance instead.
+    ordering = ['pk']
     search_fields = ['title', 'category__title']
     pagination_class = StandardResultsSetPagination
+    throttle_scope = 'menu'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'retrieve':
+            queryset = sparse_queryset(queryset, self.get_serializer())
+        return queryset
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = get_paginator(self.request, self.pagination_class)
+        return self._paginator
 
     def get_permissions(self):
-        if self.request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
+        if self.action in ['bulk_import', 'bulk_export'] or self.request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
             return [IsManager()]
         return [AllowAny()]
     
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """Upsert menu items from a streamed NDJSON or CSV body."""
+        return import_response(MenuItemImporter(), request)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Category, featured and price-bucket counts of the menu items matching the list filters and search."""
+        return self.cached_response(
+            lambda request: Response(menu_facets(self.filter_queryset(self.get_queryset()))), request,
+        )
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    def bulk_export(self, request):
+        """Stream the whole menu as NDJSON (default) or CSV with ?type=csv."""
+        return export_response(MenuItem.objects.all(), MENU_ITEM_EXPORT_FIELDS, request, 'menu-items')
+    
+    
+class CategoryImportView(APIView):
+    permission_classes = [IsManager]
+    
+    def post(self, request):
+        return import_response(CategoryImporter(), request)
+    
+    
+class CategoryExportView(APIView):
+    permission_classes = [IsManager]
+    
+    def get(self, request):
+        return export_response(Category.objects.all(), CATEGORY_EXPORT_FIELDS, request, 'categories')
+    
 class GroupManagerUsersView(APIView):
     permission_classes = [IsManager]
     group_name = 'Manager'
@@ -102,68 +168,88 @@ class GroupDeliveryCrewUsersView(APIView):
         group.user_set.remove(user)
         return Response(status=status.HTTP_200_OK)
     
-class CartView(APIView):
+class CartView(AsyncAPIView):
     permission_classes = [IsCustomer]
+    throttle_scope = 'cart'
     serializer_class = CartSerializer
 
-    def get(self, request):
+    async def get(self, request):
         user = request.user
-        menu_items = Cart.objects.filter(user=user)
-        serializer = self.serializer_class(menu_items, many=True)
+        carts = sparse_queryset(Cart.objects.filter(user=user), self.get_serializer())
+        menu_items = [item async for item in carts]
+        serializer = self.get_serializer(menu_items, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def post(self, request):
-        serializer = CartSerializer(data=request.data)
+    async def post(self, request):
+        # Accepts one {menuitem, quantity} line or a list of them. Lines are
+        # validated without touching the database, menu items are resolved
+        # with a single in_bulk() and all lines are upserted in one statement.
+        many = isinstance(request.data, list)
+        serializer = CartLineSerializer(data=request.data, many=many, **({'allow_empty': False} if many else {}))
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         else: 
-            data = serializer.validated_data
+            lines = serializer.validated_data if many else [serializer.validated_data]
             user = request.user
-            menuitem = data.get('menuitem')
-            quantity = data.get('quantity')
 
-        cart_item, created = Cart.objects.update_or_create(
-            user=user,
-            menuitem=menuitem,
-            defaults={
-                "quantity": quantity,
-                "unit_price": menuitem.price,
-                "price": menuitem.price * quantity,
-            }
+        menu_items = await MenuItem.objects.ain_bulk({line['menuitem'] for line in lines})
+        # Per-line errors keyed by line index, the same shape ListSerializer
+        # uses. Any error rejects the whole request, so a cart is never left
+        # half updated.
+        errors = {}
+        seen = set()
+        for index, line in enumerate(lines):
+            if line['menuitem'] not in menu_items:
+                errors[index] = {'menuitem': [CartLineSerializer.menuitem_does_not_exist(line['menuitem'])]}
+            elif line['menuitem'] in seen:
+                errors[index] = {'menuitem': ['Menu item appears more than once in this request.']}
+            seen.add(line['menuitem'])
+        if errors:
+            return Response(errors if many else errors[0], status=status.HTTP_400_BAD_REQUEST)
+
+        cart_items = await Cart.objects.abulk_create(
+            [
+                Cart(
+                    user=user,
+                    menuitem=menu_items[line['menuitem']],
+                    quantity=line['quantity'],
+                    unit_price=menu_items[line['menuitem']].price,
+                    price=menu_items[line['menuitem']].price * line['quantity'],
+                )
+                for line in lines
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'menuitem'],
+            update_fields=['quantity', 'unit_price', 'price'],
         )
-        serializer = self.serializer_class(cart_item)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        serializer = self.get_serializer(cart_items, many=True)
+        return Response(serializer.data if many else serializer.data[0], status=status.HTTP_201_CREATED)
 
-    def delete(self, request):
+    async def delete(self, request):
         user = request.user
-        Cart.objects.filter(user=user).delete()
+        await Cart.objects.filter(user=user).adelete()
         return Response(status=status.HTTP_200_OK)
     
-class OrderView(APIView):
+class OrderView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
     serializer_class = OrderSerializer
     pagination_class = StandardResultsSetPagination
     
-    def get(self, request):
+    async def get(self, request):
         user = request.user
-        if IsCustomer().has_permission(request, self):
+        if await IsCustomer().ahas_permission(request, self):
             orders = Order.objects.filter(user=user)
-        elif IsDeliveryCrew().has_permission(request, self):
+        elif await IsDeliveryCrew().ahas_permission(request, self):
             orders = Order.objects.filter(delivery_crew=user)
-        elif IsManager().has_permission(request, self):
+        elif await IsManager().ahas_permission(request, self):
             orders = Order.objects.all()
         else:
             return Response({'detail': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
         
         # Apply filtering
-        status_filter = request.query_params.get('status')
-        if status_filter is not None:
-            orders = orders.filter(status=status_filter.lower() in ['true', '1'])
-        
-        date_filter = request.query_params.get('date')
-        if date_filter:
-            orders = orders.filter(date=date_filter)
+        orders = _filter_orders(orders, request.query_params)
         
         # Apply ordering
         ordering = request.query_params.get('ordering', '-date')
@@ -173,116 +259,135 @@ class OrderView(APIView):
         else:
             orders = orders.order_by('-date')
         
+        # Read only the columns ?fields= / ?expand= ask for, as values() rows
+        # rendered without model instances; OrderSerializer always maps.
+        values = ValuesSerializer.for_serializer(self.get_serializer())
+        orders = values.values(orders)
+        
         # Apply pagination
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(orders, request)
+        paginator = get_paginator(request, self.pagination_class)
+        page = await paginator.apaginate_queryset(orders, request, view=self)
         if page is not None:
-            serializer = self.serializer_class(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(await values.aserialize(page))
         
-        return Response(self.serializer_class(orders, many=True).data, status=status.HTTP_200_OK)
+        orders = [order async for order in orders]
+        return Response(await values.aserialize(orders), status=status.HTTP_200_OK)
     
-    def post(self, request):
+    async def post(self, request):
         user = request.user
-        if not IsCustomer().has_permission(request, self):
+        if not await IsCustomer().ahas_permission(request, self):
             return Response({'detail': 'Only customers can place orders.'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get cart items for the user
-        cart_items = Cart.objects.filter(user=user)
+        # Transactions are not available in async code, so the atomic
+        # checkout itself runs in a worker thread.
+        checkout = enqueue_order if ORDER_INGESTION_MODE == 'queued' else place_order
+        try:
+            result = await sync_to_async(checkout)(user)
+        except CheckoutConflict:
+            return Response({'detail': 'Cart changed during checkout, please retry.'}, status=status.HTTP_409_CONFLICT)
         
-        if not cart_items.exists():
+        if result is None:
             return Response({'detail': 'Cart is empty.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate total from cart items
-        total = sum(item.price for item in cart_items)
-        
-        # Create the order
-        from datetime import date
-        order = Order.objects.create(
-            user=user,
-            total=total,
-            date=date.today(),
-            status=False
-        )
-        
-        # Create order items from cart items
-        from .models import OrderItem
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                menuitem=cart_item.menuitem,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price,
-                price=cart_item.price
+        if checkout is enqueue_order:
+            # process_order_queue creates the order; the client follows the ticket.
+            return Response(
+                CheckoutTicketSerializer(result).data, status=status.HTTP_202_ACCEPTED,
+                headers={'Location': f'{request.path.rstrip("/")}/tickets/{result.pk}'},
             )
         
-        # Delete all cart items for this user
-        cart_items.delete()
-        
+        order = result
         # Return the created order with order items
-        serializer = self.serializer_class(order)
+        serializer = self.get_serializer(await sparse_queryset(Order.objects.all(), self.get_serializer()).aget(pk=order.pk))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     
-class OrderDetailView(APIView):
+class CheckoutTicketView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
+    
+    async def get(self, request, ticket_id):
+        try:
+            ticket = await CheckoutTicket.objects.aget(id=ticket_id, user=request.user)
+        except CheckoutTicket.DoesNotExist:
+            return Response({'detail': 'Ticket not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(CheckoutTicketSerializer(ticket).data, status=status.HTTP_200_OK)
+    
+    
+class OrderDetailView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
     serializer_class = OrderSerializer
     
-    def get(self, request, order_id):
+    async def get(self, request, order_id):
         user = request.user
         
         # Only customers can view individual orders
-        if not IsCustomer().has_permission(request, self):
+        if not await IsCustomer().ahas_permission(request, self):
             return Response({'detail': 'Only customers can view orders.'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            order = Order.objects.get(id=order_id, user=user)
+            order = await sparse_queryset(Order.objects.all(), self.get_serializer()).aget(id=order_id, user=user)
         except Order.DoesNotExist:
             return Response({'detail': 'Order not found.'}, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = self.serializer_class(order)
+        serializer = self.get_serializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     
-    def patch(self, request, order_id):
+    async def patch(self, request, order_id):
         user = request.user
         
         
         try:
-            order = Order.objects.get(id=order_id)
+            # Every column is loaded, as the checks below read some that
+            # ?fields= may leave out.
+            order = await sparse_queryset(Order.objects.all(), self.get_serializer()).defer(None).aget(id=order_id)
         except Order.DoesNotExist:
             return Response({'detail': 'Order not found.'}, status=status.HTTP_404_NOT_FOUND)
+        previous_crew_id = order.delivery_crew_id
         
         # Assign delivery crew and/or update status
-        if IsManager().has_permission(request, self):
+        if await IsManager().ahas_permission(request, self):
             delivery_crew_id = request.data.get('delivery_crew_id')
             status_value = request.data.get('status')
+            changed = []
             
             # Update delivery crew if provided
             if delivery_crew_id:
                 try:
-                    delivery_crew = User.objects.get(id=delivery_crew_id)
-                    if not delivery_crew.groups.filter(name='Delivery Crew').exists():
+                    delivery_crew = await User.objects.aget(id=delivery_crew_id)
+                    if DELIVERY_CREW not in await aget_user_roles(delivery_crew):
                         return Response({'detail': 'Assigned user is not in Delivery Crew.'}, status=status.HTTP_400_BAD_REQUEST)
                     order.delivery_crew = delivery_crew
+                    changed.append('delivery_crew')
                 except User.DoesNotExist:
                     return Response({'detail': 'Delivery crew user not found.'}, status=status.HTTP_404_NOT_FOUND)
             
             # Update status if provided
             if status_value is not None:
-                order.status = status_value
+                order.status = Order._meta.get_field('status').to_python(status_value)
+                changed.append('status')
             
-            order.save()
-            serializer = self.serializer_class(order)
+            # Write only the changed columns, not the whole row.
+            if changed:
+                await order.asave(update_fields=changed)
+                await sync_to_async(publish)(order_event(
+                    'order.updated', order.pk, order.user_id, order.delivery_crew_id, order.status, previous_crew_id,
+                ))
+            serializer = self.get_serializer(order)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        elif IsDeliveryCrew().has_permission(request, self):
-            if order.delivery_crew != user:
+        elif await IsDeliveryCrew().ahas_permission(request, self):
+            if order.delivery_crew_id != user.pk:
                 return Response({'detail': 'You are not assigned to this order.'}, status=status.HTTP_403_FORBIDDEN)
             status_value = request.data.get('status', None)
             if status_value is not None:
-                order.status = status_value
-                order.save()
-                serializer = self.serializer_class(order)
+                order.status = Order._meta.get_field('status').to_python(status_value)
+                await order.asave(update_fields=['status'])
+                await sync_to_async(publish)(order_event(
+                    'order.updated', order.pk, order.user_id, order.delivery_crew_id, order.status,
+                ))
+                serializer = self.get_serializer(order)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response({'detail': 'Status value is required.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -290,17 +395,224 @@ class OrderDetailView(APIView):
             return Response({'detail': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
     
     
-    def delete(self, request, order_id):
+    async def delete(self, request, order_id):
         user = request.user
         
         # Only managers can delete orders
-        if not IsManager().has_permission(request, self):
+        if not await IsManager().ahas_permission(request, self):
             return Response({'detail': 'Only managers can delete orders.'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            order = Order.objects.get(id=order_id)
+            order = await Order.objects.aget(id=order_id)
         except Order.DoesNotExist:
             return Response({'detail': 'Order not found.'}, status=status.HTTP_404_NOT_FOUND)
         
-        order.delete()
-        return Response(status=status.HTTP_200_OK)
\ No newline at end of file
+        await sync_to_async(delete_order)(order)
+        return Response(status=status.HTTP_200_OK)
+    
+    
+class OrderStatusView(AsyncAPIView):
+    """Set the status of many orders at once; delivery crew only reach their own."""
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
+    
+    async def patch(self, request):
+        if await IsManager().ahas_permission(request, self):
+            delivery_crew = None
+        elif await IsDeliveryCrew().ahas_permission(request, self):
+            delivery_crew = request.user
+        else:
+            return Response({'detail': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        params = BulkStatusSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = await sync_to_async(update_order_status)(
+            params.validated_data['orders'], params.validated_data['status'], delivery_crew,
+        )
+        return Response({'results': [
+            {'order': order_id, 'updated': True} if error is None else {'order': order_id, 'updated': False, 'detail': error}
+            for order_id, error in results.items()
+        ]}, status=status.HTTP_200_OK)
+    
+    
+class OrderEventsView(AsyncAPIView):
+    """Server-sent events for the order changes the caller may see.
+    
+    Managers get every order, delivery crew the orders assigned (or no longer
+    assigned) to them and customers their own. Reconnecting clients send
+    Last-Event-ID to get what they missed. Waiting costs no database queries.
+    Only served under ASGI; WSGI deployments use OrderEventsPollView.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
+    
+    def perform_content_negotiation(self, request, force=False):
+        # No renderer produces text/event-stream; errors are rendered as JSON.
+        return super().perform_content_negotiation(request, force=True)
+    
+    async def get(self, request):
+        if 'wsgi.version' in request.META:
+            # A WSGI worker would have to buffer the endless stream, or hold
+            # a thread per subscriber while it iterates it synchronously.
+            return Response(
+                {'detail': 'Event streams need an ASGI server; poll /api/orders/events/poll instead.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        
+        keys = subscription_keys(request.user, await aget_roles(request))
+        last_id = request.headers.get('Last-Event-ID', '')
+        response = StreamingHttpResponse(
+            event_stream(keys, int(last_id) if last_id.isdigit() else None), content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    
+class OrderEventsPollView(AsyncAPIView):
+    """Long-poll fallback of OrderEventsView: waits up to ?timeout= seconds for events after ?since=."""
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'orders'
+    
+    async def get(self, request):
+        params = EventPollSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        keys = subscription_keys(request.user, await aget_roles(request))
+        since = params.validated_data.get('since')
+        events = await wait_for_events(keys, since, params.validated_data['timeout'])
+        last_id = events[-1]['id'] if events else since if since is not None else broker.last_id()
+        return Response({'events': events, 'last_id': last_id}, status=status.HTTP_200_OK)
+    
+    
+def _filter_orders(orders, params):
+    status_filter = params.get('status')
+    if status_filter is not None:
+        # status__in rather than status=: Django renders a boolean equality
+        # as a bare "status" / NOT "status" predicate that SQLite cannot
+        # match against the composite indexes on Order.
+        orders = orders.filter(status__in=[status_filter.lower() in ['true', '1']])
+    
+    date_filter = params.get('date')
+    if date_filter:
+        orders = orders.filter(date=date_filter)
+    return orders
+    
+    
+def _date_range_filter(params, field='date'):
+    filters = {}
+    if 'start' in params:
+        filters[f'{field}__gte'] = params['start']
+    if 'end' in params:
+        filters[f'{field}__lte'] = params['end']
+    return filters
+    
+    
+class OrderExportView(APIView):
+    """Stream every matching order with its items as NDJSON or CSV (?type=csv)."""
+    permission_classes = [IsManager]
+    throttle_scope = 'orders'
+    
+    def get(self, request):
+        params = DateRangeSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        orders = _filter_orders(Order.objects.filter(**_date_range_filter(params.validated_data)), request.query_params)
+        return order_export_response(orders, request)
+    
+    
+class OrderDispatchView(APIView):
+    """Assign unassigned, undelivered orders to the least-loaded delivery crew."""
+    permission_classes = [IsManager]
+    throttle_scope = 'orders'
+    
+    def post(self, request):
+        params = DispatchSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        assignments = dispatch_orders(params.validated_data.get('limit'))
+        return Response({
+            'assigned': len(assignments),
+            'assignments': [{'order': order_id, 'delivery_crew': crew_id} for order_id, crew_id in assignments.items()],
+        }, status=status.HTTP_200_OK)
+    
+    
+class OrderAssignView(APIView):
+    """Assign many orders to delivery crew members at once."""
+    permission_classes = [IsManager]
+    throttle_scope = 'orders'
+    
+    def post(self, request):
+        params = BulkAssignSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        assignments = {item['order']: item['delivery_crew'] for item in params.validated_data['assignments']}
+        errors = assign_orders(assignments)
+        if errors:
+            return Response(
+                {'errors': [{'order': order_id, 'detail': detail} for order_id, detail in errors.items()]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'assigned': len(assignments)}, status=status.HTTP_200_OK)
+    
+    
+class SalesAnalyticsView(APIView):
+    """Revenue and order count per day plus the average ticket, read from DailySales."""
+    permission_classes = [IsManager]
+    
+    def get(self, request):
+        params = DateRangeSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        days = DailySales.objects.filter(order_count__gt=0, **_date_range_filter(params.validated_data)).order_by('date')
+        totals = days.aggregate(order_count=Sum('order_count'), revenue=Sum('revenue'))
+        order_count = totals['order_count'] or 0
+        revenue = totals['revenue'] or Decimal(0)
+        average_ticket = revenue / order_count if order_count else Decimal(0)
+        
+        serializer = SalesSummarySerializer({
+            'order_count': order_count,
+            'revenue': revenue,
+            'average_ticket': average_ticket,
+            'days': days,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    
+class TopMenuItemsView(APIView):
+    """Best-selling menu items over a date range, read from MenuItemDailySales."""
+    permission_classes = [IsManager]
+    
+    def get(self, request):
+        params = TopMenuItemsQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = params.validated_data
+        items = (
+            MenuItemDailySales.objects.filter(**_date_range_filter(data))
+            .values('menuitem')
+            .annotate(title=F('menuitem__title'), quantity=Sum('quantity'), revenue=Sum('revenue'))
+            .filter(quantity__gt=0)
+            .order_by(f"-{data['by']}", 'menuitem')[:data['limit']]
+        )
+        return Response(MenuItemSalesSerializer(items, many=True).data, status=status.HTTP_200_OK)
+    
+    
+class PerformanceStatsView(APIView):
+    """Per-endpoint latency, database, serialization and rendering time and query count percentiles of this process."""
+    permission_classes = [IsManager]
+    
+    def get(self, request):
+        return Response({'endpoints': registry.snapshot()}, status=status.HTTP_200_OK)
+    
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)